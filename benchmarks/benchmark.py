@@ -0,0 +1,261 @@
+""" Benchmarks of the color, filter and texture hot paths.
+
+Usage:
+    python -m benchmarks.benchmark [--update-baseline] [--tolerance 0.25]
+        [--repeat 5] [--baseline file] [case...]
+
+Every case runs with fixed sizes and seeds and needs no network or data
+beyond what is in the repository. For each case the best time of several
+runs and the peak memory allocated (traced by tracemalloc in one extra run)
+are reported.
+
+Results are appended to history.jsonl in this directory, one line per run,
+so they can be tracked over time. They are compared to baseline.json, and
+the run fails if any case is slower, or needs more memory, than the baseline
+by more than the tolerance. --update-baseline stores the results as the new
+baseline instead; baselines only make sense on the machine they were
+recorded on.
+
+No baseline is kept in the repository, and without one a run never fails.
+CI is expected to keep the baseline itself, on the same runner type: run
+with --update-baseline on the main branch and save the file (e.g. as a
+build cache or artifact), then restore it on other builds and pass it with
+--baseline. A baseline from a different kind of machine would report false
+regressions.
+
+Cases whose optional dependencies are missing are skipped.
+
+"""
+from typing import Callable, Dict, List, Tuple
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(_DIR, 'baseline.json')
+HISTORY = os.path.join(_DIR, 'history.jsonl')
+
+# Timing noise allowed on top of the tolerance, in seconds, so the fastest
+# cases don't fail on scheduler jitter.
+TIME_SLACK = 0.002
+
+# Case name -> function returning the function to time. Setup done by the
+# outer function is not timed.
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    """ Register a benchmark case. """
+    def register(setup: Callable[[], Callable[[], object]]):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case('munsell.create_color_dict')
+def _create_color_dict():
+    from color import munsell
+    return munsell.create_color_dict
+
+
+@case('munsell.from_rgb x100')
+def _from_rgb():
+    from color import munsell
+    colors = np.random.default_rng(0).integers(0, 256, (100, 3)).tolist()
+    munsell.from_rgb(colors[0])
+    return lambda: [munsell.from_rgb(tuple(rgb)) for rgb in colors]
+
+
+@case('munsell.from_rgb_array 512x512')
+def _from_rgb_array():
+    from color import munsell
+    image = np.random.default_rng(0).integers(0, 256, (512, 512, 3),
+                                              dtype=np.uint8)
+    munsell.from_rgb_array(image[:1, :1])
+    return lambda: munsell.from_rgb_array(image)
+
+
+@case('munsell.to_rgb x1000')
+def _to_rgb():
+    from color import munsell
+    rng = np.random.default_rng(0)
+    specs = [(munsell.hues[h], int(v), float(c)) for h, v, c in
+             zip(rng.integers(0, len(munsell.hues), 1000),
+                 rng.integers(1, 10, 1000), rng.uniform(0, 12, 1000))]
+    munsell.to_rgb(*specs[0])
+    return lambda: [munsell.to_rgb(*spec) for spec in specs]
+
+
+@case('munsell.to_rgb continuous 1M')
+def _to_rgb_continuous():
+    from color import munsell
+    rng = np.random.default_rng(0)
+    hue = rng.uniform(0, len(munsell.hues), 1 << 20).astype(np.float32)
+    value = rng.uniform(0, 10, 1 << 20).astype(np.float32)
+    chroma = rng.uniform(0, 20, 1 << 20).astype(np.float32)
+    munsell.to_rgb(hue[:1], value[:1], chroma[:1], continuous=True)
+    return lambda: munsell.to_rgb(hue, value, chroma, continuous=True)
+
+
+def _whitening_filter_case(size: int):
+    def setup():
+        from filter.whiten import whitening_filter
+        return lambda: whitening_filter(size)
+    return setup
+
+
+for _size in (512, 1024, 2048, 4096):
+    case('whiten.whitening_filter %d' % _size)(_whitening_filter_case(_size))
+
+
+def _whiten_case(shape: Tuple[int, ...]):
+    def setup():
+        from filter.whiten import whiten
+        image = np.random.default_rng(0).random(shape, dtype=np.float32)
+        whiten(image)
+        return lambda: whiten(image)
+    return setup
+
+
+case('whiten.whiten gray 2048')(_whiten_case((2048, 2048)))
+case('whiten.whiten color 2048')(_whiten_case((2048, 2048, 3)))
+
+
+@case('spectral_noise.noise 2048')
+def _noise():
+    from texture import spectral_noise
+    rng = np.random.default_rng(0)
+    spectral_noise.noise(2048, -1.0, rng=rng)
+    return lambda: spectral_noise.noise(2048, -1.0, rng=rng)
+
+
+@case('spectral_noise.color_noise 2048')
+def _color_noise():
+    from texture import spectral_noise
+    rng = np.random.default_rng(0)
+    spectral_noise.color_noise(2048, -1.0, rng=rng)
+    return lambda: spectral_noise.color_noise(2048, -1.0, rng=rng)
+
+
+@case('swatches.paint_swatch zorn palette')
+def _paint_swatch():
+    from color.palette_compiler import SPEC_DIR, compile_spec, load_spec
+    from color.swatches import new_palette, paint_swatch
+    spec = load_spec(os.path.join(SPEC_DIR, 'zorn_palette.json'))
+    rows, columns, colors = compile_spec(spec)
+    size = spec['swatch_size']
+
+    def render():
+        image = new_palette(spec['rows'], spec['columns'], size)
+        for row, column, color in zip(rows, columns, colors):
+            paint_swatch(image, row, column, color, size)
+        return image
+    return render
+
+
+def run_case(setup: Callable[[], Callable[[], object]], repeat: int) -> dict:
+    """ Time a case and measure its peak traced memory. """
+    function = setup()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+
+def run(names: List[str], repeat: int) -> Dict[str, dict]:
+    results = {}
+    for name in names:
+        try:
+            results[name] = run_case(CASES[name], repeat)
+        except ImportError as e:
+            print('%-40s skipped: %s' % (name, e))
+            continue
+        print('%-40s %9.4f s %9.1f MB' % (name, results[name]['seconds'],
+                                          results[name]['peak_bytes'] / 2**20))
+    return results
+
+
+def regressions(results: Dict[str, dict], baseline: Dict[str, dict],
+                tolerance: float) -> List[str]:
+    """ Describe each result worse than the baseline by more than the
+    tolerance, a fraction. """
+    found = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ('seconds', 'peak_bytes'):
+            limit = baseline[name][key] * (1 + tolerance)
+            if key == 'seconds':
+                limit += TIME_SLACK
+            if result[key] > limit:
+                found.append('%s: %s %.4g > %.4g (baseline %.4g)' % (
+                    name, key, result[key], limit, baseline[name][key]))
+    return found
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              cwd=_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the benchmarks.')
+    parser.add_argument('cases', nargs='*',
+                        help='cases to run, default is all; a case is run if '
+                             'its name contains any of these')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed runs per case, the best is reported')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed fraction over the baseline')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='store the results as the baseline')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='baseline file, default is baseline.json here')
+    args = parser.parse_args()
+
+    names = [name for name in CASES
+             if not args.cases or any(c in name for c in args.cases)]
+    results = run(names, args.repeat)
+    with open(HISTORY, 'a') as f:
+        f.write(json.dumps({
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'results': results,
+        }) + '\n')
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print('file', args.baseline, 'written')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print('REGRESSION', regression)
+        if found:
+            sys.exit(1)
+        print('no regressions')
+    else:
+        print('no baseline, run with --update-baseline to store one')
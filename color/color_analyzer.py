@@ -3,8 +3,14 @@
 Prompts the user for an image file name then displays it. Shows the RGB
 and Munsell color for the pixel pointed at by the mouse.
 
+The Munsell colors of the whole displayed image are computed once, on a
+background thread, so that moving the mouse only requires an array lookup.
+For statistics of entire images without a display, see munsell_statistics.
+
 """
 import os
+import threading
+import numpy as np
 from tkinter import Label, Tk, StringVar
 from tkinter.filedialog import askopenfilename
 from PIL import ImageTk, Image
@@ -32,23 +38,46 @@ if __name__ == '__main__':
     panel.pack(side = "bottom", fill = "both", expand = "yes")
     position.pack(side = 'top', fill='both', expand='yes')
 
+    # Munsell (hue, value, chroma) arrays of the displayed image, filled in
+    # by a background thread.
+    pixels = np.asarray(raw_image.convert('RGB'))
+    munsell_map = []
+
+    def compute_munsell_map():
+        munsell_map.extend(munsell.from_rgb_array(pixels))
+
+    threading.Thread(target=compute_munsell_map, daemon=True).start()
+
     def clamp(n, smallest, largest):
         return max(smallest, min(n, largest))
 
+    # Latest mouse position not yet displayed. Mouse events arriving faster
+    # than the display refreshes just overwrite it, so only the most recent
+    # one is shown.
+    pending = []
+
+    def show_color():
+        x, y = pending.pop()
+        rgb = pixels[y, x]
+        if munsell_map:
+            hues, values, chromas = munsell_map
+            munsell_color = (munsell.hues[hues[y, x]] + '  ' +
+                             str(values[y, x]) + '  ' + str(chromas[y, x]))
+        else:
+            munsell_color = '(computing)'
+        location.set('hue value chroma:  ' + munsell_color +
+                     '   rgb:  ' +
+                     str(rgb[0]) + ' ' + str(rgb[1]) + ' ' + str(rgb[2])
+                     )
+
     def motion(event):
         # Get mouse position clamped to borders of displayed image.
         width = img.width()
         height = img.height()
         x, y = clamp(event.x, 0, width - 1), clamp(event.y, 0, height - 1)
-
-        # Display color info.
-        rgb = raw_image.getpixel((x, y))
-        hue, value, chroma = munsell.from_rgb(rgb)
-        location.set('hue value chroma:  ' +
-                     hue + '  ' + str(value) + '  ' + str(chroma) +
-                     '   rgb:  ' +
-                     str(rgb[0]) + ' ' + str(rgb[1]) + ' ' + str(rgb[2])
-                     )
+        if not pending:
+            window.after_idle(show_color)
+        pending[:] = [(x, y)]
 
     window.bind('<Motion>', motion)
     window.mainloop()
@@ -3,10 +3,22 @@
 
 Intermediate hues can be mixed on canvas as needed.
 
+Usage:
+    python -m color.color_palettes [--all-hues] [--processes N]
+
+With --all-hues, the '2.5' and '7.5' hue palettes are generated as well.
+The palettes are rendered in parallel, one hue per process, and a contact
+sheet with all of them is written alongside the individual files.
+
 """
-from typing import Tuple
-from tkinter import Tk, Canvas, PhotoImage, mainloop
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+import argparse
+import os
+import numpy as np
+from PIL import Image, ImageDraw
 from color import munsell
+from color.swatches import PALETTE_DIR, new_palette, paint_swatch, save_palette
 
 # Supported Munsell hues (half of the total), ordered clockwise.
 hues = ('5R', '10R', '5YR', '10YR', '5Y', '10Y', '5GY', '10GY', '5G', '10G',
@@ -27,38 +39,69 @@ SWATCH_SIZE = 25
 PALETTE_WIDTH = PALETTE_COLUMNS * SWATCH_SIZE
 PALETTE_HEIGHT = PALETTE_ROWS * SWATCH_SIZE
 
+# Contact sheet layout: one row of hue palettes per hue family.
+CONTACT_MARGIN = 20
+CONTACT_LABEL_HEIGHT = 15
+
+
+def render_hue_palette(hue: str) -> np.ndarray:
+    """ Render the palette for one hue: values by row, chromas by column. """
+    rgb_colors = munsell.to_rgb(munsell.hue_index[hue],
+                                np.array(values)[:, np.newaxis],
+                                np.array(chromas)[np.newaxis, :])
+    img = new_palette(PALETTE_ROWS, PALETTE_COLUMNS, SWATCH_SIZE)
+    for row in range(len(values)):
+        for column in range(len(chromas)):
+            paint_swatch(img, row, column, rgb_colors[row, column],
+                         SWATCH_SIZE)
+    return img
+
+
+def write_hue_palette(hue: str) -> np.ndarray:
+    """ Render the palette for one hue and write it to PALETTE_DIR. """
+    file = os.path.join(PALETTE_DIR, hue + '.png')
+    print('creating', file)
+    img = render_hue_palette(hue)
+    save_palette(img, file)
+    return img
+
+
+def contact_sheet(palette_hues: Sequence[str],
+                  palettes: Sequence[np.ndarray],
+                  columns: int) -> np.ndarray:
+    """ Lay out labeled hue palettes on a single white RGBA sheet. """
+    cell_width = PALETTE_WIDTH + CONTACT_MARGIN
+    cell_height = PALETTE_HEIGHT + CONTACT_LABEL_HEIGHT + CONTACT_MARGIN
+    rows = (len(palettes) + columns - 1) // columns
+    sheet = Image.new('RGBA', (CONTACT_MARGIN + columns * cell_width,
+                               CONTACT_MARGIN + rows * cell_height),
+                      (255, 255, 255, 255))
+    draw = ImageDraw.Draw(sheet)
+    for index, (hue, img) in enumerate(zip(palette_hues, palettes)):
+        x = CONTACT_MARGIN + (index % columns) * cell_width
+        y = CONTACT_MARGIN + (index // columns) * cell_height
+        draw.text((x, y), hue, fill=(0, 0, 0, 255))
+        palette = Image.fromarray(img)
+        sheet.paste(palette, (x, y + CONTACT_LABEL_HEIGHT), palette)
+    return np.asarray(sheet)
 
-def paint_swatch(image: PhotoImage, row: int, column: int,
-                 color: Tuple[int, int, int]):
-    """ Paint a color swatch on the palette in (row, column). """
-    if column < 0 or column >= PALETTE_COLUMNS:
-        raise ValueError('bad column')
-    if row < 0 or row >= PALETTE_ROWS:
-        raise ValueError('bad row')
-    x_start = column * SWATCH_SIZE
-    y_start = row * SWATCH_SIZE
-    for x in range(x_start, x_start + SWATCH_SIZE - 1):
-        for y in range(y_start, y_start + SWATCH_SIZE - 1):
-            image.put("#%02x%02x%02x" % color, (x, y))
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Munsell hue palettes.')
+    parser.add_argument('--all-hues', action='store_true',
+                        help='include the 2.5 and 7.5 hues (40 in all)')
+    parser.add_argument('--processes', type=int,
+                        help='worker processes, default is one per CPU')
+    args = parser.parse_args()
+    palette_hues = munsell.hues if args.all_hues else hues
 
-window = Tk()
-window.title('Color Palette')
-canvas = Canvas(window, width=PALETTE_WIDTH, height=PALETTE_HEIGHT, bg='#000000')
-canvas.pack()
+    # Make sure the Munsell table cache exists before the workers need it.
+    munsell.dense_table()
+    with ProcessPoolExecutor(args.processes) as executor:
+        palettes = list(executor.map(write_hue_palette, palette_hues))
 
-for hue in hues:
-    file = '../palettes/' + hue + '.png'
+    sheet_name = 'all_hues' if args.all_hues else 'hues'
+    file = os.path.join(PALETTE_DIR, 'contact_sheet_' + sheet_name + '.png')
     print('creating', file)
-    img = PhotoImage(width=PALETTE_WIDTH, height=PALETTE_HEIGHT)
-    canvas.create_image((PALETTE_WIDTH // 2, PALETTE_HEIGHT // 2), image=img,
-                        state='normal')
-    canvas.image = img  # To prevent garbage collection
-    for column, chroma in enumerate(chromas):
-        for row, value in enumerate(values):
-            rgb_color = munsell.to_rgb(hue, value, chroma)
-            if rgb_color is not None:
-                paint_swatch(img, row, column, rgb_color)
-    canvas.image.write(file, format='png')
-
-mainloop()
+    save_palette(contact_sheet(palette_hues, palettes,
+                               columns=len(palette_hues) // 10), file)
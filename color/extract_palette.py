@@ -0,0 +1,152 @@
+""" Extract a palette of Munsell colors from an image.
+
+Usage:
+    python -m color.extract_palette [-n 16] [--output file] image
+
+A random subsample of the pixels is clustered with mini-batch k-means in
+CIELAB, where distances roughly match perceived color differences. Each
+cluster center is then snapped to the nearest real Munsell chip, and the
+chips are rendered as a palette, ordered by hue and value, with the usual
+swatch layout.
+
+Only the subsample is ever clustered, so the cost is nearly independent of
+the image size; JPEGs are also decoded at reduced resolution when that still
+leaves enough pixels.
+
+"""
+from typing import List, Tuple
+import argparse
+import os
+import numpy as np
+from PIL import Image
+from color import munsell
+from color.swatches import new_palette, paint_swatch, save_palette
+
+
+# Palette layout.
+PALETTE_COLUMNS = 10
+SWATCH_SIZE = 50
+
+
+def sample_pixels(filename: str, samples: int,
+                  rng: np.random.Generator) -> np.ndarray:
+    """ Return a random sample of at most samples pixels of an image, as an
+    (N, 3) uint8 array.
+    """
+    with Image.open(filename) as image:
+        # Let the JPEG decoder downscale, keeping ~16 pixels per sample.
+        width, height = image.size
+        scale = max(1, int(np.sqrt(width * height / (16 * samples))))
+        image.draft('RGB', (width // scale, height // scale))
+        pixels = np.asarray(image.convert('RGB')).reshape(-1, 3)
+    if len(pixels) > samples:
+        pixels = pixels[rng.choice(len(pixels), samples, replace=False)]
+    return pixels
+
+
+def _nearest_center(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """ Index of the nearest center for each point. """
+    dist_sq = (np.einsum('ij,ij->i', points, points)[:, np.newaxis]
+               - 2 * points @ centers.T
+               + np.einsum('ij,ij->i', centers, centers)[np.newaxis, :])
+    return np.argmin(dist_sq, axis=1)
+
+
+def mini_batch_kmeans(points: np.ndarray, k: int, rng: np.random.Generator,
+                      batch_size: int = 4096, iterations: int = 100) \
+        -> np.ndarray:
+    """ Cluster points, shape (N, D), with mini-batch k-means (Sculley 2010).
+
+    Returns:
+        Cluster centers, shape (k, D).
+    """
+    # k-means++ initialization on one batch.
+    batch = points[rng.choice(len(points), min(batch_size, len(points)),
+                              replace=False)]
+    centers = [batch[rng.integers(len(batch))]]
+    for _ in range(1, k):
+        dist_sq = ((batch[:, np.newaxis, :] - np.array(centers)) ** 2) \
+            .sum(axis=2).min(axis=1)
+        if dist_sq.sum() == 0:
+            break
+        centers.append(batch[rng.choice(len(batch), p=dist_sq / dist_sq.sum())])
+    centers = np.array(centers)
+
+    # Each center moves toward the mean of the points assigned to it, with a
+    # step size that shrinks as the center accumulates points.
+    counts = np.zeros(len(centers))
+    for _ in range(iterations):
+        batch = points[rng.integers(len(points), size=batch_size)]
+        nearest = _nearest_center(batch, centers)
+        batch_counts = np.bincount(nearest, minlength=len(centers))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, nearest, batch)
+        counts += batch_counts
+        used = batch_counts > 0
+        centers[used] += ((sums[used] - batch_counts[used, np.newaxis]
+                           * centers[used]) / counts[used, np.newaxis])
+    return centers
+
+
+def extract_palette(filename: str, colors: int = 16, samples: int = 200000,
+                    seed: int = 0) -> List[Tuple[int, float]]:
+    """ Extract the dominant Munsell colors of an image.
+
+    Returns:
+        (entry, fraction) pairs: munsell.table_entries() index of each chip,
+        and the fraction of the sampled pixels it covers, ordered by hue then
+        value. Clusters that snap to the same chip are merged.
+    """
+    rng = np.random.default_rng(seed)
+    lab = munsell.rgb_to_lab(sample_pixels(filename, samples, rng))
+    centers = mini_batch_kmeans(lab, colors, rng)
+    weights = np.bincount(_nearest_center(lab, centers),
+                          minlength=len(centers)) / len(lab)
+    entries = munsell.lab_to_index(centers)
+
+    coverage = {}
+    for entry, weight in zip(entries, weights):
+        coverage[int(entry)] = coverage.get(int(entry), 0.0) + weight
+    hues, values, chromas, _ = munsell.table_entries()
+    # Neutral colors have no real hue, so they go last.
+    order = sorted(coverage, key=lambda e: (chromas[e] == 0, hues[e],
+                                            values[e], chromas[e]))
+    return [(entry, coverage[entry]) for entry in order]
+
+
+def render_palette(entries: List[int]) -> np.ndarray:
+    """ Render Munsell table entries as a palette, row by row. """
+    rgb = munsell.table_entries()[3]
+    rows = (len(entries) + PALETTE_COLUMNS - 1) // PALETTE_COLUMNS
+    img = new_palette(rows, PALETTE_COLUMNS, SWATCH_SIZE)
+    for index, entry in enumerate(entries):
+        paint_swatch(img, index // PALETTE_COLUMNS, index % PALETTE_COLUMNS,
+                     rgb[entry], SWATCH_SIZE)
+    return img
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Extract a Munsell palette from an image.')
+    parser.add_argument('image', help='image file')
+    parser.add_argument('-n', '--colors', type=int, default=16,
+                        help='number of colors to extract')
+    parser.add_argument('--samples', type=int, default=200000,
+                        help='number of pixels to cluster')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='palette file name')
+    args = parser.parse_args()
+    Image.MAX_IMAGE_PIXELS = None  # Allow very large photos and scans.
+
+    palette = extract_palette(args.image, args.colors, args.samples,
+                              args.seed)
+    hues, values, chromas, _ = munsell.table_entries()
+    for entry, fraction in palette:
+        print('%6s %2d %2d  %5.1f%%' % (munsell.hues[hues[entry]],
+                                        values[entry], chromas[entry],
+                                        100 * fraction))
+    output = args.output
+    if output is None:
+        output = os.path.splitext(args.image)[0] + '_palette.png'
+    save_palette(render_palette([entry for entry, _ in palette]), output)
+    print('file', output, 'written')
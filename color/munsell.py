@@ -9,14 +9,26 @@ color-theory-how-to-convert-munsell-hvc-to-rgb-hsb-hsl) so instead I do linear
 interpolation of the Munsell data from RIT.
 
 The computed Munsell color is found by searching for the nearest RGB neighbor
-of the given color in the Munsell color dictionary.
+of the given color in the Munsell color dictionary. Optionally the search can
+be done in CIELAB instead, where Euclidean distance (Delta E 1976) roughly
+matches perceived color difference.
 
 """
 from typing import Tuple, Dict
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import hashlib
 import math
+import os
 import numpy
 
 
+# Directory holding the Munsell data files.
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Directory for files derived from the Munsell table.
+CACHE_DIR = os.path.join(_DIR, 'cache')
+
 # Grayscale values in RGB. From: http://www.andrewwerth.com/color/
 # Munsell uses an 11 value scale, from 0 (black) to 10 (white). For painting,
 # we use only values 1 through 9.
@@ -34,6 +46,15 @@ gray_rgb_values = [
     (255, 255, 255)
 ]
 
+# Munsell hues in order around the hue circle, starting just after 10RP. The
+# position of a hue in this tuple is its "hue index".
+hues = tuple(step + family
+             for family in ('R', 'YR', 'Y', 'GY', 'G', 'BG', 'B', 'PB', 'P', 'RP')
+             for step in ('2.5', '5', '7.5', '10'))
+
+# Map from hue string to hue index.
+hue_index = {hue: index for index, hue in enumerate(hues)}
+
 
 def average(rgb1: Tuple[int, int, int], rgb2: Tuple[int, int, int]) \
         -> Tuple[int, int, int]:
@@ -45,21 +66,22 @@ def average(rgb1: Tuple[int, int, int], rgb2: Tuple[int, int, int]) \
 
 
 def create_color_dict() -> Dict[Tuple[str, int, int], Tuple[int, int, int]]:
-    """ Create the dictionary mapping (hue, value, chroma) to (r, g, b). """
-    file = 'real_sRGB.csv'
+    """ Create the dictionary mapping (hue, value, chroma) to (r, g, b).
+
+    This parses and interpolates real_sRGB.csv, which is slow; use the cached
+    munsell_to_rgb instead.
+    """
+    file = os.path.join(_DIR, 'real_sRGB.csv')
     dictionary = dict()
-    hues = set()
-    with open(file, 'r') as f:
-        lines = f.read().splitlines()
-        for i in range(1, len(lines)):
-            _, hue, value, chroma, *_, r, g, b = lines[i].split(',')
-            value = int(value)
-            chroma = int(chroma)
-            r = int(r)
-            g = int(g)
-            b = int(b)
-            dictionary[(hue, value, chroma)] = (r, g, b)
-            hues.add(hue)
+    hues = []   # In file order, so the dictionary order is reproducible.
+    with open(file, 'r', newline='') as f:
+        reader = csv.reader(f)
+        next(reader)  # Skip header
+        for _, hue, value, chroma, *_, r, g, b in reader:
+            dictionary[(hue, int(value), int(chroma))] = (int(r), int(g),
+                                                           int(b))
+            if hue not in hues:
+                hues.append(hue)
 
     # Add grayscale values for each hue.
     chroma = 0
@@ -76,7 +98,110 @@ def create_color_dict() -> Dict[Tuple[str, int, int], Tuple[int, int, int]]:
     return dictionary
 
 
-munsell_to_rgb = create_color_dict()
+# The Munsell table, in create_color_dict() order, loaded on first use by
+# _load_table().
+_table_hues = None      # Hue index of each entry.
+_table_values = None    # Value of each entry.
+_table_chromas = None   # Chroma of each entry.
+_table_rgb = None       # (r, g, b) of each entry, shape (entries, 3).
+_munsell_to_rgb = None  # The table as a dictionary, see munsell_to_rgb.
+
+
+def _table_source() -> str:
+    """ Hash the inputs of create_color_dict(): the data file and this code.
+    """
+    digest = hashlib.sha1()
+    for file in (os.path.join(_DIR, 'real_sRGB.csv'), os.path.abspath(__file__)):
+        with open(file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_table():
+    """ Load the Munsell table, from the cache in CACHE_DIR if it is up to
+    date, otherwise from real_sRGB.csv (refreshing the cache).
+    """
+    global _table_hues, _table_values, _table_chromas, _table_rgb
+    global _munsell_to_rgb
+    if _table_rgb is not None:
+        return
+    filename = os.path.join(CACHE_DIR, 'munsell_table.npz')
+    source = _table_source()
+    if os.path.exists(filename):
+        with numpy.load(filename) as cache:
+            if str(cache['source']) == source:
+                _table_hues = cache['hues']
+                _table_values = cache['values']
+                _table_chromas = cache['chromas']
+                _table_rgb = cache['rgb']
+                return
+
+    dictionary = create_color_dict()
+    keys = tuple(dictionary.keys())
+    _table_hues = numpy.array([hue_index[key[0]] for key in keys],
+                              dtype=numpy.uint8)
+    _table_values = numpy.array([key[1] for key in keys], dtype=numpy.uint8)
+    _table_chromas = numpy.array([key[2] for key in keys], dtype=numpy.uint8)
+    _table_rgb = numpy.array([dictionary[key] for key in keys],
+                             dtype=numpy.uint8)
+    _munsell_to_rgb = dictionary
+
+    temp_filename = filename[:-len('.npz')] + '.' + str(os.getpid()) + '.npz'
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        numpy.savez(temp_filename, source=source, hues=_table_hues,
+                    values=_table_values, chromas=_table_chromas,
+                    rgb=_table_rgb)
+        os.replace(temp_filename, filename)
+    except OSError:
+        # The cache is only an optimization, e.g. CACHE_DIR may be read-only
+        # in an installed package. Keep the table in memory.
+        _remove(temp_filename)
+
+
+def _remove(filename: str):
+    """ Remove a file if it exists, ignoring errors. """
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+def _color_dict() -> Dict[Tuple[str, int, int], Tuple[int, int, int]]:
+    """ Return the Munsell table as a dictionary, see munsell_to_rgb. """
+    global _munsell_to_rgb
+    if _munsell_to_rgb is None:
+        _load_table()
+    if _munsell_to_rgb is None:
+        _munsell_to_rgb = {
+            (hues[h], int(v), int(c)): tuple(int(x) for x in rgb)
+            for h, v, c, rgb in zip(_table_hues, _table_values,
+                                    _table_chromas, _table_rgb)
+        }
+    return _munsell_to_rgb
+
+
+def table_entries() -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                             numpy.ndarray]:
+    """ Return the Munsell table as arrays, one element per entry in
+    munsell_to_rgb order (the order of the indices returned by
+    rgb_to_index()).
+
+    Returns:
+        (hue, value, chroma, rgb) uint8 arrays. The hue is an index into the
+        hues tuple; rgb has shape (entries, 3).
+    """
+    _load_table()
+    return _table_hues, _table_values, _table_chromas, _table_rgb
+
+
+def __getattr__(name: str):
+    # munsell_to_rgb, the dictionary mapping (hue, value, chroma) to
+    # (r, g, b), is only loaded when first used.
+    if name == 'munsell_to_rgb':
+        return _color_dict()
+    raise AttributeError('module ' + repr(__name__) + ' has no attribute '
+                         + repr(name))
 
 
 def distance(rgb1: Tuple[int, int, int], rgb2: Tuple[int, int, int]) -> float:
@@ -87,11 +212,50 @@ def distance(rgb1: Tuple[int, int, int], rgb2: Tuple[int, int, int]) -> float:
     return math.sqrt(r**2 + g**2 + b**2)
 
 
-def from_rgb(rgb: Tuple[int, int, int]) -> (str, int, int):
-    """ Return the nearest munsell color for an RGB tuple. """
+# Linear sRGB to CIE XYZ, and the D65 reference white.
+_SRGB_TO_XYZ = numpy.array([[0.4124, 0.3576, 0.1805],
+                            [0.2126, 0.7152, 0.0722],
+                            [0.0193, 0.1192, 0.9505]])
+_D65_WHITE = numpy.array([0.95047, 1.0, 1.08883])
+
+# Supported distance metrics for finding the nearest Munsell color.
+METRICS = ('rgb', 'lab')
+
+
+def rgb_to_lab(rgb: numpy.ndarray) -> numpy.ndarray:
+    """ Convert sRGB colors, shape (..., 3) from 0 to 255, to CIELAB (D65).
+    """
+    rgb = numpy.asarray(rgb, dtype=numpy.float64) / 255.0
+    linear = numpy.where(rgb <= 0.04045, rgb / 12.92,
+                         ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _SRGB_TO_XYZ.T / _D65_WHITE
+    epsilon = (6 / 29) ** 3
+    f = numpy.where(xyz > epsilon, numpy.cbrt(xyz),
+                    xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return numpy.stack((116 * f[..., 1] - 16,
+                        500 * (f[..., 0] - f[..., 1]),
+                        200 * (f[..., 1] - f[..., 2])), axis=-1)
+
+
+def from_rgb(rgb: Tuple[int, int, int], metric: str = 'rgb') \
+        -> (str, int, int):
+    """ Return the nearest munsell color for an RGB tuple.
+
+    Args:
+        rgb: The color.
+        metric: 'rgb' for Euclidean distance in sRGB, or 'lab' for
+            Euclidean distance in CIELAB.
+    """
+    if metric == 'lab':
+        _nearest_neighbor_index()
+        entry = _nearest_entries(numpy.array([rgb], numpy.int32), metric)[0]
+        return (hues[_table_hues[entry]], int(_table_values[entry]),
+                int(_table_chromas[entry]))
+    elif metric != 'rgb':
+        raise ValueError('unknown metric: ' + str(metric))
     min_distance = 1e50
     min_color = None
-    for munsell, rgb_ in munsell_to_rgb.items():
+    for munsell, rgb_ in _color_dict().items():
         dist = distance(rgb, rgb_)
         if dist < min_distance:
             min_distance = dist
@@ -99,53 +263,408 @@ def from_rgb(rgb: Tuple[int, int, int]) -> (str, int, int):
     return min_color
 
 
-def to_rgb(hue: str, value: int, chroma: float) -> Tuple[int, int, int]:
+# Nearest neighbor index over the Munsell table, built on first use by
+# _nearest_neighbor_index(). See rgb_to_index().
+_unique_rgb = None      # Distinct RGB colors in the table.
+_unique_entry = None    # First table entry having each distinct RGB color.
+_rgb_tree = None        # KD-tree over _unique_rgb.
+_lab_tree = None        # KD-tree over _unique_rgb in CIELAB.
+
+# Number of neighbors fetched per query. Ties beyond this are resolved by
+# brute force, which is exact but slow; they essentially never happen.
+_NEIGHBORS = 8
+
+
+def _nearest_neighbor_index():
+    """ Build the arrays and KD-tree used by rgb_to_index(). """
+    global _unique_rgb, _unique_entry, _rgb_tree, _lab_tree
+    if _rgb_tree is None:
+        # Imported here since scipy.spatial takes longer to import than the
+        # whole Munsell table takes to load.
+        from scipy.spatial import cKDTree
+        _load_table()
+
+        # from_rgb() returns the first entry at the minimum distance, so a
+        # color appearing several times in the table (e.g. the grays shared
+        # by all hues) is represented by its first entry only.
+        _unique_rgb, _unique_entry = numpy.unique(
+            _table_rgb.astype(numpy.int32), axis=0, return_index=True)
+        _rgb_tree = cKDTree(_unique_rgb)
+        _lab_tree = cKDTree(rgb_to_lab(_unique_rgb))
+
+
+def _nearest_entries(rgb: numpy.ndarray, metric: str = 'rgb') \
+        -> numpy.ndarray:
+    """ Find the table entry nearest to each row of an (N, 3) int32 array.
+    For the 'rgb' metric ties are broken exactly the way from_rgb() does.
+    """
+    if metric == 'lab':
+        _, nearest = _lab_tree.query(rgb_to_lab(rgb), workers=-1)
+        return _unique_entry[nearest]
+    elif metric != 'rgb':
+        raise ValueError('unknown metric: ' + str(metric))
+
+    k = min(_NEIGHBORS, len(_unique_rgb))
+    _, neighbors = _rgb_tree.query(rgb, k=k, workers=-1)
+    neighbors = neighbors.reshape(len(rgb), k)
+
+    # Redo the distances in integer arithmetic so that ties are exact.
+    delta = _unique_rgb[neighbors] - rgb[:, None, :]
+    dist_sq = numpy.einsum('ijk,ijk->ij', delta, delta)
+    min_dist_sq = dist_sq.min(axis=1, keepdims=True)
+    entries = numpy.where(dist_sq == min_dist_sq, _unique_entry[neighbors],
+                          len(_table_rgb))
+    nearest = entries.min(axis=1)
+
+    # If every neighbor found is tied, there may be more ties further out.
+    crowded = numpy.flatnonzero(dist_sq[:, -1] == min_dist_sq[:, 0])
+    for i in crowded:
+        delta = _unique_rgb - rgb[i]
+        dist_sq = numpy.einsum('ij,ij->i', delta, delta)
+        nearest[i] = _unique_entry[dist_sq == dist_sq.min()].min()
+    return nearest
+
+
+def lab_to_index(lab: numpy.ndarray) -> numpy.ndarray:
+    """ Find the munsell_to_rgb entry nearest in CIELAB to each color of an
+    array of shape (..., 3), see rgb_to_lab().
+    """
+    _nearest_neighbor_index()
+    lab = numpy.asarray(lab, dtype=numpy.float64)
+    _, nearest = _lab_tree.query(lab.reshape(-1, 3), workers=-1)
+    return _unique_entry[nearest].reshape(lab.shape[:-1])
+
+
+# Memory-mapped tables from every 24 bit RGB color to its nearest entry, one
+# per metric. See rgb_lookup_table().
+_rgb_lookup_tables = {}
+
+
+def table_version() -> str:
+    """ Return a hash identifying the contents and order of munsell_to_rgb.
+
+    This changes whenever real_sRGB.csv or the rules in create_color_dict()
+    change, so it is used to key files derived from the table.
+    """
+    _load_table()
+    digest = hashlib.sha1()
+    for array in (_table_hues, _table_values, _table_chromas, _table_rgb):
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _lookup_table_slice(red: int, metric: str) -> numpy.ndarray:
+    """ Compute the (256, 256) block of the RGB lookup table for one red. """
+    _nearest_neighbor_index()
+    green, blue = numpy.meshgrid(numpy.arange(256, dtype=numpy.int32),
+                                 numpy.arange(256, dtype=numpy.int32),
+                                 indexing='ij')
+    rgb = numpy.stack((numpy.full(green.size, red, dtype=numpy.int32),
+                       green.ravel(), blue.ravel()), axis=1)
+    return _nearest_entries(rgb, metric).astype(numpy.uint16).reshape(256, 256)
+
+
+def rgb_lookup_table(processes: int = None,
+                     metric: str = 'rgb') -> numpy.ndarray:
+    """ Return the table of nearest munsell_to_rgb entries for all RGB colors.
+
+    The table is a read-only (256, 256, 256) uint16 array indexed by
+    [red, green, blue], memory-mapped from a file in CACHE_DIR. The file is
+    built in parallel the first time it is needed after the Munsell table
+    changes, which takes a while, and is simply opened after that.
+
+    Args:
+        processes: Number of worker processes used to build the file,
+            default is one per CPU.
+        metric: Distance metric, see from_rgb().
+    """
+    if metric not in METRICS:
+        raise ValueError('unknown metric: ' + str(metric))
+    if metric not in _rgb_lookup_tables:
+        filename = os.path.join(CACHE_DIR, 'rgb_to_munsell_' + metric + '_'
+                                + table_version() + '.npy')
+        if os.path.exists(filename):
+            table = numpy.load(filename, mmap_mode='r')
+        else:
+            print('building', filename)
+            temp_filename = filename + '.' + str(os.getpid()) + '.tmp'
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                table = numpy.lib.format.open_memmap(
+                    temp_filename, mode='w+', dtype=numpy.uint16,
+                    shape=(256, 256, 256))
+            except OSError:
+                # CACHE_DIR is not writable, keep the table in memory.
+                _remove(temp_filename)
+                table = numpy.empty((256, 256, 256), dtype=numpy.uint16)
+            _fill_lookup_table(table, processes, metric)
+            if isinstance(table, numpy.memmap):
+                table.flush()
+                del table
+                os.replace(temp_filename, filename)
+                table = numpy.load(filename, mmap_mode='r')
+            else:
+                table.flags.writeable = False
+        _rgb_lookup_tables[metric] = table
+    return _rgb_lookup_tables[metric]
+
+
+def _fill_lookup_table(table: numpy.ndarray, processes: int, metric: str):
+    """ Compute the RGB lookup table into table, in parallel. """
+    with ProcessPoolExecutor(processes) as executor:
+        for red, block in enumerate(executor.map(
+                _lookup_table_slice, range(256), [metric] * 256)):
+            table[red] = block
+
+
+# Images with fewer pixels than this find their distinct colors by sorting in
+# rgb_to_index(), larger ones with tables over all 2^24 colors.
+_SMALL_IMAGE = 1 << 16
+
+
+def rgb_to_index(image: numpy.ndarray, use_lookup_table: bool = False,
+                 metric: str = 'rgb') -> numpy.ndarray:
+    """ Find the nearest munsell_to_rgb entry for every pixel of an image.
+
+    Args:
+        image: uint8 array of RGB colors, shape (..., 3), e.g. an HxWx3 image.
+        use_lookup_table: Read the answers from rgb_lookup_table() rather
+            than searching for them.
+        metric: Distance metric, see from_rgb().
+
+    Returns:
+        int array of shape image.shape[:-1] holding, for each pixel, the
+        position in munsell_to_rgb of the entry from_rgb() would return.
+    """
+    if image.dtype != numpy.uint8 or image.shape[-1] != 3:
+        raise ValueError('image must be a uint8 RGB array')
+    _nearest_neighbor_index()
+    if use_lookup_table:
+        table = rgb_lookup_table(metric=metric)
+        return table[image[..., 0], image[..., 1], image[..., 2]]
+
+    # Pack each pixel into a 24 bit code and look up only the distinct colors.
+    codes = ((image[..., 0].astype(numpy.int32) << 16) |
+             (image[..., 1].astype(numpy.int32) << 8) |
+             image[..., 2])
+    if codes.size < _SMALL_IMAGE:
+        # Sorting a few codes is cheaper than clearing the 2^24 tables.
+        colors, inverse = numpy.unique(codes, return_inverse=True)
+    else:
+        present = numpy.zeros(1 << 24, dtype=bool)
+        present[codes] = True
+        colors = numpy.flatnonzero(present).astype(numpy.int32)
+    rgb = numpy.stack((colors >> 16, (colors >> 8) & 0xff, colors & 0xff),
+                      axis=1)
+    nearest = _nearest_entries(rgb, metric).astype(numpy.int16)
+    if codes.size < _SMALL_IMAGE:
+        return nearest[inverse].reshape(codes.shape)
+    lookup = numpy.zeros(1 << 24, dtype=numpy.int16)
+    lookup[colors] = nearest
+    return lookup[codes]
+
+
+def from_rgb_array(image: numpy.ndarray, use_lookup_table: bool = False,
+                   metric: str = 'rgb') \
+        -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """ Return the nearest munsell color for every pixel of an RGB image.
+
+    This gives exactly the same answers as calling from_rgb() on each pixel.
+
+    Args:
+        image: uint8 array of RGB colors, shape (..., 3), e.g. an HxWx3 image.
+        use_lookup_table: Read the answers from rgb_lookup_table() rather
+            than searching for them.
+        metric: Distance metric, see from_rgb().
+
+    Returns:
+        (hue, value, chroma) uint8 arrays of shape image.shape[:-1]. The hue
+        is an index into the hues tuple.
+    """
+    index = rgb_to_index(image, use_lookup_table, metric)
+    return _table_hues[index], _table_values[index], _table_chromas[index]
+
+
+# Dense form of the Munsell table, built on first use by dense_table().
+_dense_rgb = None        # (r, g, b) indexed by [hue, value, chroma].
+_dense_valid = None      # True where [hue, value, chroma] is in the table.
+_dense_truncated = None  # Largest valid chroma <= chroma at [hue, value, chroma].
+
+
+def dense_table() -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """ Return the Munsell table as dense arrays.
+
+    Returns:
+        (rgb, valid), where rgb is a uint8 array of shape
+        (len(hues), 11, max chroma + 1, 3) indexed by [hue index, value,
+        chroma], and valid is a bool array of shape (len(hues), 11,
+        max chroma + 1) that is True where rgb holds a table entry. Colors
+        outside the RGB gamut are not valid.
+    """
+    global _dense_rgb, _dense_valid, _dense_truncated
+    if _dense_rgb is None:
+        _load_table()
+        shape = (len(hues), 11, int(_table_chromas.max()) + 1)
+        _dense_rgb = numpy.zeros(shape + (3,), dtype=numpy.uint8)
+        _dense_valid = numpy.zeros(shape, dtype=bool)
+        _dense_rgb[_table_hues, _table_values, _table_chromas] = _table_rgb
+        _dense_valid[_table_hues, _table_values, _table_chromas] = True
+
+        # Chroma 0 is valid for every hue and value, so truncation always
+        # finds a color.
+        chromas = numpy.arange(shape[2])
+        _dense_truncated = numpy.maximum.accumulate(
+            numpy.where(_dense_valid, chromas, 0), axis=2)
+    return _dense_rgb, _dense_valid
+
+
+def hue_to_index(hue: str) -> float:
+    """ Convert any Munsell hue string, e.g. "6.25YR", to a (fractional) hue
+    index, e.g. 5.5. Hue index i is at an angle of 9 * (i + 1) degrees around
+    the hue circle.
+    """
+    family = hue.lstrip('0123456789.')
+    step = float(hue[:len(hue) - len(family)])
+    families = hues[3::4]
+    if family not in [h[2:] for h in families] or not 0 < step <= 10:
+        raise ValueError('bad hue: ' + hue)
+    family_index = [h[2:] for h in families].index(family)
+    return (4 * family_index + step / 2.5 - 1) % len(hues)
+
+
+# Gamut-truncated colors at every integer (hue, value, chroma), as float32,
+# with the first hue repeated at the end so hue interpolation can wrap around.
+# Built on first use by _interpolation_grid().
+_grid = None
+
+
+def _interpolation_grid() -> numpy.ndarray:
+    global _grid
+    if _grid is None:
+        _, valid = dense_table()
+        hue, value, chroma = numpy.indices(valid.shape)
+        grid = to_rgb(hue, value, chroma).astype(numpy.float32)
+        _grid = numpy.concatenate((grid, grid[:1]), axis=0)
+    return _grid
+
+
+def _to_rgb_continuous(hue, value, chroma) -> numpy.ndarray:
+    """ Trilinear interpolation of _interpolation_grid(), see to_rgb(). """
+    grid = _interpolation_grid()
+    if isinstance(hue, str):
+        hue = hue_to_index(hue)
+    hue = numpy.mod(numpy.asarray(hue, dtype=numpy.float32), len(hues))
+    value = numpy.clip(numpy.asarray(value, dtype=numpy.float32), 0, 10)
+    chroma = numpy.clip(numpy.asarray(chroma, dtype=numpy.float32), 0,
+                        grid.shape[2] - 1)
+    hue, value, chroma = numpy.broadcast_arrays(hue, value, chroma)
+
+    # Lower corner of the grid cell holding each point, and the position
+    # within the cell. Points on the upper edge use the cell below.
+    corner = []
+    fraction = []
+    for x, size in zip((hue, value, chroma), grid.shape[:3]):
+        low = numpy.minimum(x.astype(numpy.intp), size - 2)
+        corner.append(low)
+        fraction.append((x - low)[..., numpy.newaxis])
+
+    # Flat index of the lower corner, and offsets to the other seven.
+    strides = numpy.array(grid.strides[:3]) // grid.strides[2]
+    flat_grid = grid.reshape(-1, 3)
+    base = (corner[0] * strides[0] + corner[1] * strides[1] +
+            corner[2] * strides[2])
+    rgb = numpy.zeros(base.shape + (3,), dtype=numpy.float32)
+    for dh in (0, 1):
+        wh = fraction[0] if dh else 1 - fraction[0]
+        for dv in (0, 1):
+            wv = fraction[1] if dv else 1 - fraction[1]
+            for dc in (0, 1):
+                wc = fraction[2] if dc else 1 - fraction[2]
+                offset = dh * strides[0] + dv * strides[1] + dc * strides[2]
+                rgb += (wh * wv * wc) * flat_grid[base + offset]
+    return numpy.rint(rgb).astype(numpy.uint8)
+
+
+def _integer_index(x, name: str) -> numpy.ndarray:
+    """ Convert integral numbers, e.g. 5 or 5.0, to an intp array. """
+    x = numpy.asarray(x)
+    if x.dtype.kind not in 'iu':
+        index = x.astype(numpy.intp)
+        if numpy.any(index != x):
+            raise ValueError(name + ' must be an integer, or use '
+                             'continuous=True')
+        x = index
+    return x
+
+
+def to_rgb(hue, value, chroma, continuous: bool = False):
     """ Convert a Munsell (hue, value, chroma) color spec to RGB using
     linear interpolation
 
+    All arguments may also be arrays (of hue indices, for the hue) which are
+    broadcast against each other, to convert a whole palette in one call.
+
+    By default the hue must be in the table and the value an integer, and
+    chroma is interpolated by averaging the colors at the integer chromas on
+    either side. With continuous=True, hue, value and chroma may all be
+    fractional (hue strings like "6.25YR", or fractional hue indices, see
+    hue_to_index()) and the color is trilinearly interpolated from a
+    precomputed grid; the hue wraps around the hue circle.
+
     Args:
-        hue: E.g. "7.5YR"
+        hue: E.g. "7.5YR", or its index in hues.
         value: Value from 1 (darkest) to 9 (lightest)
-        chroma: Value greater than zero (in principle unbounded).
+        chroma: Value greater than zero (in principle unbounded). Chromas
+            outside the RGB gamut are truncated to the gamut, negative
+            chromas are treated as zero.
+        continuous: Interpolate across hue, value and chroma.
 
     Returns:
-        RGB triple, None if (hue, value, chroma) doesn't exist in the
-        RGB color space (RGB has limited chroma).
+        RGB triple; or a uint8 array of shape (..., 3) if any argument is an
+        array.
     """
-    if chroma == 0:
-        return gray_rgb_values[value]
-    else:
-        # Since our munsell_to_rgb map is indexed by integers but our chroma
-        # is is float, interpolate.
-        low_chroma = math.floor(chroma)
-        high_chroma = math.ceil(chroma)
-        low_rgb = munsell_to_rgb.get((hue, value, low_chroma))
-        while low_rgb is None:
-            # Outside the RGB gamut, so truncate.
-            low_chroma -= 1
-            low_rgb =  munsell_to_rgb.get((hue, value, low_chroma))
-        high_rgb = munsell_to_rgb.get((hue, value, high_chroma))
-        if high_rgb is None:
-            high_rgb = low_rgb   # Overflowing Munsell space, truncate.
-        rgb = average(low_rgb, high_rgb)
+    if continuous:
+        rgb = _to_rgb_continuous(hue, value, chroma)
+        if any(numpy.ndim(x) > 0 for x in (hue, value, chroma)):
+            return rgb
+        return tuple(int(x) for x in rgb)
+    dense_table()
+    if isinstance(hue, str):
+        hue = hue_index[hue]
+    is_array = any(numpy.ndim(x) > 0 for x in (hue, value, chroma))
+    hue = _integer_index(hue, 'hue')
+    value = _integer_index(value, 'value')
+    # Negative chromas are neutral, as with continuous=True.
+    chroma = numpy.maximum(numpy.asarray(chroma, dtype=numpy.float64), 0)
+
+    # Since our table is indexed by integers but our chroma is float,
+    # interpolate between the chromas on either side, truncating any outside
+    # the RGB gamut.
+    max_chroma = _dense_valid.shape[2] - 1
+    low_chroma = numpy.minimum(numpy.floor(chroma).astype(numpy.intp),
+                               max_chroma)
+    low_chroma = _dense_truncated[hue, value, low_chroma]
+    high_chroma = numpy.ceil(chroma).astype(numpy.intp)
+    high_chroma = numpy.where(high_chroma > max_chroma, low_chroma,
+                              high_chroma)
+    high_chroma = numpy.where(_dense_valid[hue, value, high_chroma],
+                              high_chroma, low_chroma)
+    low_rgb = _dense_rgb[hue, value, low_chroma].astype(numpy.int32)
+    high_rgb = _dense_rgb[hue, value, high_chroma]
+    rgb = ((low_rgb + high_rgb) // 2).astype(numpy.uint8)  # See average().
+    if is_array:
         return rgb
+    return tuple(int(x) for x in rgb)
 
 
 def write_munsell_to_rgb_csv_file():
-    filename = 'munsell_to_rgb.csv'
-    with open(filename, 'w') as f:
-        f.write("hue,value,chroma,r,g,b\n")
-        for key in munsell_to_rgb:
-            hue = key[0]
-            value = key[1]
-            chroma = key[2]
-            rgb = munsell_to_rgb[key]
-            r = rgb[0]
-            g = rgb[1]
-            b = rgb[2]
-            line = (hue + ',' + str(value) + ',' + str(chroma) + ','
-                    + str(r) + ',' + str(g) + ',' + str(b) + '\n')
-            f.write(line)
+    """ Write the interpolated Munsell table to munsell_to_rgb.csv. """
+    _load_table()
+    filename = os.path.join(_DIR, 'munsell_to_rgb.csv')
+    rows = numpy.column_stack((numpy.array(hues)[_table_hues], _table_values,
+                               _table_chromas, _table_rgb))
+    numpy.savetxt(filename, rows, fmt='%s', delimiter=',',
+                  header='hue,value,chroma,r,g,b', comments='')
     print('file', filename, 'written')
 
 
@@ -0,0 +1,234 @@
+""" Munsell statistics of whole images, without a display.
+
+Usage:
+    python -m color.munsell_statistics [--tile 1024] [--metric lab] image...
+
+For each image, writes a JSON report and an NPZ file of the raw counts next
+to it (or to --output). The report has hue, value and chroma histograms, a
+value key histogram (values 1 through 9, the range used for painting), and
+the most common Munsell colors.
+
+Images are streamed through the Munsell lookup table one tile at a time,
+and only the count of every Munsell table entry is kept, so memory use for
+the analysis is set by the tile size rather than the image size. NumPy .npy
+files (HxWx3 uint8) are memory-mapped and never fully loaded. Uncompressed
+images (e.g. TIFF, whether in strips or tiles, BMP or PPM) are read and
+decoded one band of tile size rows at a time. Compressed images (e.g. PNG, JPEG or
+LZW TIFF) can only be decoded whole, so above MAX_DECODED_PIXELS they are
+refused; convert such scans to .npy first.
+
+"""
+from typing import BinaryIO, Iterator, Optional, Tuple
+import argparse
+import json
+import os
+import numpy as np
+from PIL import Image
+from color import munsell
+
+
+# EXIF orientation tag.
+_ORIENTATION = 0x0112
+
+# Largest image, in pixels, decoded whole when it can't be read in bands.
+MAX_DECODED_PIXELS = 1 << 26
+
+
+def _raw_tiles(image: Image.Image) -> Optional[list]:
+    """ Describe where the rows of an uncompressed image are in its file.
+
+    Returns:
+        (extents, offset, rawmode, stride, orientation) of each tile PIL
+        would decode the image from, or None if the rows can't be read on
+        their own (compressed or rotated images).
+    """
+    if not image.tile or any(tile[0] != 'raw' for tile in image.tile):
+        return None
+    # Check the tiles first, reading the EXIF data may decode a PNG.
+    if image.getexif().get(_ORIENTATION, 1) != 1:
+        # PIL rotates these once decoded.
+        return None
+    tiles = []
+    for _, extents, offset, args in image.tile:
+        if isinstance(args, str):
+            args = (args,)
+        rawmode, stride, orientation = tuple(args) + (0, 1)[len(args) - 1:]
+        if orientation not in (1, -1):
+            return None
+        if not stride:
+            try:
+                row = Image.new(image.mode, (extents[2] - extents[0], 1))
+                stride = len(row.tobytes('raw', rawmode))
+            except ValueError:
+                return None
+        tiles.append((extents, offset, rawmode, stride, orientation))
+    return tiles
+
+
+def _decode_rows(file: BinaryIO, image: Image.Image, tiles: list, y: int,
+                 end: int) -> np.ndarray:
+    """ Read and decode rows y to end of an image, see _raw_tiles(). """
+    rows = np.empty((end - y, image.size[0], 3), dtype=np.uint8)
+    for (x0, y0, x1, y1), offset, rawmode, stride, orientation in tiles:
+        top, bottom = max(y, y0), min(end, y1)
+        if top >= bottom:
+            continue
+        # Bottom-up (orientation -1) tiles store their last row first.
+        first = top - y0 if orientation == 1 else y1 - bottom
+        file.seek(offset + first * stride)
+        data = file.read((bottom - top) * stride)
+        part = Image.frombuffer(image.mode, (x1 - x0, bottom - top), data,
+                                'raw', rawmode, stride, orientation)
+        if image.mode in ('P', 'PA'):
+            part.putpalette(image.getpalette())
+        rows[top - y:bottom - y, x0:x1] = np.asarray(part.convert('RGB'))
+    return rows
+
+
+def _image_bands(filename: str, rows: int) -> Iterator[np.ndarray]:
+    """ Yield an image file decoded by PIL, as bands of rows if possible. """
+    with Image.open(filename) as image:
+        width, height = image.size
+        tiles = _raw_tiles(image)
+        if tiles is None:
+            if width * height > MAX_DECODED_PIXELS:
+                raise ValueError(
+                    '%s is %d by %d pixels and can only be decoded whole; '
+                    'convert it to an HxWx3 uint8 .npy file first'
+                    % (filename, width, height))
+            yield np.asarray(image.convert('RGB'))
+            return
+        with open(filename, 'rb') as file:
+            for y in range(0, height, rows):
+                yield _decode_rows(file, image, tiles, y,
+                                   min(y + rows, height))
+
+
+def image_tiles(filename: str, tile_size: int = 1024) \
+        -> Iterator[np.ndarray]:
+    """ Yield an image as HxWx3 uint8 tiles of at most tile_size squared. """
+    if filename.endswith('.npy'):
+        image = np.load(filename, mmap_mode='r')
+        if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] != 3:
+            raise ValueError('.npy image must be an HxWx3 uint8 array')
+        bands = [image]
+    else:
+        bands = _image_bands(filename, tile_size)
+
+    for band in bands:
+        height, width = band.shape[:2]
+        for y in range(0, height, tile_size):
+            for x in range(0, width, tile_size):
+                yield np.asarray(band[y:y + tile_size, x:x + tile_size])
+
+
+def entry_counts(filename: str, tile_size: int = 1024,
+                 metric: str = 'rgb') -> np.ndarray:
+    """ Count the pixels of an image nearest to each Munsell table entry.
+
+    Returns:
+        int64 array with one count per entry of munsell.table_entries().
+    """
+    entries = len(munsell.table_entries()[0])
+    counts = np.zeros(entries, dtype=np.int64)
+    for tile in image_tiles(filename, tile_size):
+        index = munsell.rgb_to_index(tile, use_lookup_table=True,
+                                     metric=metric)
+        counts += np.bincount(index.ravel(), minlength=entries)
+    return counts
+
+
+def statistics(counts: np.ndarray, top: int = 20) -> dict:
+    """ Summarize Munsell table entry counts, see entry_counts().
+
+    Hue is meaningless for neutral (chroma 0) colors, so those are left out
+    of the hue histogram and counted as 'neutral' instead.
+    """
+    entry_hues, entry_values, entry_chromas, entry_rgb = \
+        munsell.table_entries()
+    pixels = int(counts.sum())
+    chromatic = np.where(entry_chromas > 0, counts, 0)
+    hue_histogram = np.bincount(entry_hues, weights=chromatic,
+                                minlength=len(munsell.hues))
+    value_histogram = np.bincount(entry_values, weights=counts, minlength=11)
+    chroma_histogram = np.bincount(entry_chromas, weights=counts)
+    value_key = np.bincount(np.clip(entry_values, 1, 9), weights=counts,
+                            minlength=10)[1:]
+
+    dominant = []
+    for entry in np.argsort(-counts, kind='stable')[:top]:
+        if counts[entry] == 0:
+            break
+        dominant.append({
+            'hue': munsell.hues[entry_hues[entry]],
+            'value': int(entry_values[entry]),
+            'chroma': int(entry_chromas[entry]),
+            'rgb': [int(c) for c in entry_rgb[entry]],
+            'fraction': float(counts[entry]) / pixels,
+        })
+
+    return {
+        'pixels': pixels,
+        'neutral': int(counts[entry_chromas == 0].sum()),
+        'hue_histogram': dict(zip(munsell.hues, hue_histogram.astype(int)
+                                  .tolist())),
+        'value_histogram': value_histogram.astype(int).tolist(),
+        'chroma_histogram': chroma_histogram.astype(int).tolist(),
+        'value_key_histogram': dict(zip(range(1, 10), value_key.astype(int)
+                                        .tolist())),
+        'mean_value': float(value_histogram @ np.arange(11)) / pixels,
+        'dominant_colors': dominant,
+    }
+
+
+def analyze(filename: str, output: str = None, tile_size: int = 1024,
+            metric: str = 'rgb', top: int = 20) -> Tuple[str, str]:
+    """ Write the Munsell statistics report for an image file.
+
+    Args:
+        filename: The image.
+        output: Path prefix of the report files, default is the image file
+            name without its extension.
+        tile_size: Size of the square tiles the image is streamed in.
+        metric: Distance metric, see munsell.from_rgb().
+        top: Number of dominant colors to report.
+
+    Returns:
+        Names of the JSON report and the NPZ counts file written.
+    """
+    if output is None:
+        output = os.path.splitext(filename)[0]
+    counts = entry_counts(filename, tile_size, metric)
+    report = statistics(counts, top)
+    report['image'] = filename
+    report['metric'] = metric
+    report['table_version'] = munsell.table_version()
+
+    json_file = output + '_munsell.json'
+    npz_file = output + '_munsell.npz'
+    with open(json_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    entry_hues, entry_values, entry_chromas, _ = munsell.table_entries()
+    np.savez(npz_file, counts=counts, hues=entry_hues, values=entry_values,
+             chromas=entry_chromas)
+    return json_file, npz_file
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Munsell statistics of large images.')
+    parser.add_argument('images', nargs='+', help='image files to analyze')
+    parser.add_argument('--output', help='report path prefix (one image only)')
+    parser.add_argument('--tile', type=int, default=1024, help='tile size')
+    parser.add_argument('--metric', choices=munsell.METRICS, default='rgb')
+    parser.add_argument('--top', type=int, default=20,
+                        help='number of dominant colors to report')
+    args = parser.parse_args()
+    Image.MAX_IMAGE_PIXELS = None  # Gallery scans are legitimately huge.
+    if args.output is not None and len(args.images) > 1:
+        parser.error('--output needs a single image')
+    for image_file in args.images:
+        print('analyzing', image_file)
+        for written in analyze(image_file, args.output, args.tile,
+                               args.metric, args.top):
+            print('file', written, 'written')
@@ -0,0 +1,196 @@
+""" Compile declarative palette specs into palette images.
+
+Usage:
+    python -m color.palette_compiler [--force] [spec.json ...]
+
+With no spec files, every spec in palette_specs/ is compiled. A palette is
+only re-rendered when its spec or the Munsell table has changed since it was
+last built (or its output file is missing).
+
+A spec is a JSON file:
+
+    {
+      "output": "zorn_palette.png",     file name in the palettes directory
+      "rows": 3, "columns": 45,          palette size in swatches
+      "swatch_size": 50,                 swatch size in pixels
+      "background": [0, 0, 0],           optional, default is transparent
+      "defaults": {...},                 optional, default block fields
+      "blocks": [{...}, ...]
+    }
+
+Each block is a run of swatches of one hue, one per Munsell value:
+
+    {
+      "hue": "5YR",
+      "row": 0, "column": 9,             position of the first swatch
+      "direction": "horizontal",         or "vertical"
+      "values": [1, 2, 3],
+      "chroma": ...
+    }
+
+The chroma is a number, a list with one chroma per value, or a curve:
+
+    {"curve": "table", "chromas": [...]}  chroma indexed by value 0 to 10
+    {"curve": "tent", "peak_value": 7, "peak_chroma": 3,
+     "low_zero": -1, "high_zero": 10}    linear from zero at low_zero up to
+                                         peak_chroma at peak_value, then down
+                                         to zero at high_zero
+
+Optional "low_span" and "high_span" fields of a tent set the run of each
+slope, which otherwise ends at the peak value.
+
+"""
+from typing import List, Sequence, Tuple
+import argparse
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from color import munsell
+from color.swatches import PALETTE_DIR, new_palette, paint_swatch, save_palette
+
+
+# Directory of the palette specs that come with this package.
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'palette_specs')
+
+# Record of the hash each palette file was last built from.
+BUILD_RECORD = os.path.join(munsell.CACHE_DIR, 'palette_builds.json')
+
+# Change this when the compiler renders specs differently.
+COMPILER_VERSION = 1
+
+
+def load_spec(filename: str) -> dict:
+    """ Read a palette spec from a JSON file. """
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def chroma_curve(chroma, values: np.ndarray) -> np.ndarray:
+    """ Evaluate a block's chroma spec at an array of Munsell values. """
+    if isinstance(chroma, (int, float)):
+        chromas = np.full(values.shape, float(chroma))
+    elif isinstance(chroma, list):
+        if len(chroma) != len(values):
+            raise ValueError('need one chroma per value')
+        chromas = np.array(chroma, dtype=np.float64)
+    elif chroma.get('curve') == 'table':
+        chromas = np.array(chroma['chromas'], dtype=np.float64)[values]
+    elif chroma.get('curve') == 'tent':
+        peak_value = chroma['peak_value']
+        peak_chroma = chroma['peak_chroma']
+        low_zero = chroma['low_zero']
+        high_zero = chroma['high_zero']
+        low_span = chroma.get('low_span', peak_value - low_zero)
+        high_span = chroma.get('high_span', high_zero - peak_value)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rising = peak_chroma * (values - low_zero) / low_span
+            falling = peak_chroma * (high_zero - values) / high_span
+        tent = np.where(values < peak_value, rising,
+                        np.where(values > peak_value, falling, peak_chroma))
+        # Zero, not negative, beyond low_zero and high_zero.
+        return np.maximum(tent, 0)
+    else:
+        raise ValueError('unknown chroma curve: ' + str(chroma.get('curve')))
+    if np.any(chromas < 0):
+        raise ValueError('chromas must not be negative')
+    return chromas
+
+
+def compile_spec(spec: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Work out the swatches of a palette spec.
+
+    Returns:
+        (rows, columns, colors): swatch positions, and the swatch colors as
+        an (N, 3) uint8 array.
+    """
+    rows, columns, hues, values, chromas = [], [], [], [], []
+    for block in spec['blocks']:
+        block = dict(spec.get('defaults', {}), **block)
+        block_values = np.array(block['values'], dtype=np.intp)
+        steps = np.arange(len(block_values))
+        if block.get('direction', 'horizontal') == 'horizontal':
+            rows.append(np.full(len(steps), block['row']))
+            columns.append(block['column'] + steps)
+        elif block['direction'] == 'vertical':
+            rows.append(block['row'] + steps)
+            columns.append(np.full(len(steps), block['column']))
+        else:
+            raise ValueError('unknown direction: ' + str(block['direction']))
+        hues.append(np.full(len(steps), munsell.hue_index[block['hue']]))
+        values.append(block_values)
+        chromas.append(chroma_curve(block['chroma'], block_values))
+    colors = munsell.to_rgb(np.concatenate(hues), np.concatenate(values),
+                            np.concatenate(chromas))
+    return np.concatenate(rows), np.concatenate(columns), colors
+
+
+def render_spec(spec: dict) -> np.ndarray:
+    """ Render a palette spec as a palette image. """
+    swatch_size = spec['swatch_size']
+    background = spec.get('background')
+    img = new_palette(spec['rows'], spec['columns'], swatch_size,
+                      None if background is None else tuple(background))
+    for row, column, color in zip(*compile_spec(spec)):
+        paint_swatch(img, row, column, color, swatch_size)
+    return img
+
+
+def spec_hash(spec: dict) -> str:
+    """ Hash everything a rendered palette depends on. """
+    digest = hashlib.sha1()
+    digest.update(json.dumps(spec, sort_keys=True).encode())
+    digest.update(munsell.table_version().encode())
+    digest.update(str(COMPILER_VERSION).encode())
+    return digest.hexdigest()
+
+
+def build(spec_files: Sequence[str], output_dir: str = PALETTE_DIR,
+          force: bool = False) -> List[str]:
+    """ Render the palettes of the given spec files that are out of date.
+
+    Returns:
+        Names of the palette files written.
+    """
+    record = {}
+    if os.path.exists(BUILD_RECORD):
+        with open(BUILD_RECORD, 'r') as f:
+            record = json.load(f)
+
+    written = []
+    os.makedirs(output_dir, exist_ok=True)
+    for spec_file in spec_files:
+        spec = load_spec(spec_file)
+        file = os.path.abspath(os.path.join(output_dir, spec['output']))
+        digest = spec_hash(spec)
+        if not force and record.get(file) == digest and os.path.exists(file):
+            continue
+        print('creating', file)
+        save_palette(render_spec(spec), file)
+        record[file] = digest
+        written.append(file)
+
+    if written:
+        # The record only saves rebuilds, so a read-only cache is no error.
+        try:
+            os.makedirs(os.path.dirname(BUILD_RECORD), exist_ok=True)
+            with open(BUILD_RECORD, 'w') as f:
+                json.dump(record, f, indent=2)
+        except OSError as e:
+            print('warning: build record not written:', e)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile palette specs.')
+    parser.add_argument('specs', nargs='*', help='spec files, default is all')
+    parser.add_argument('--output-dir', default=PALETTE_DIR)
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild even if up to date')
+    args = parser.parse_args()
+    spec_files = args.specs or sorted(glob.glob(os.path.join(SPEC_DIR,
+                                                             '*.json')))
+    written = build(spec_files, args.output_dir, args.force)
+    print(len(written), 'of', len(spec_files), 'palettes rebuilt')
@@ -0,0 +1,163 @@
+""" Quantize an image to the swatches of one of our palettes.
+
+Shows what a reference photo would look like painted with only the colors
+of a palette.
+
+Usage:
+    python -m color.quantize [--dither] [--output file] image palette
+
+The palette is the name of a spec in palette_specs (e.g. zorn_palette) or a
+spec file, see palette_compiler. Each pixel is replaced by the nearest
+swatch color (Euclidean distance in RGB), optionally with Floyd-Steinberg
+error diffusion.
+
+The nearest swatch of every possible 24 bit color is precomputed once per
+palette and memory-mapped from the Munsell cache directory, so plain
+quantization is a single fancy-indexing operation.
+
+"""
+import argparse
+import hashlib
+import os
+import numpy as np
+from PIL import Image
+from color import munsell
+from color.palette_compiler import SPEC_DIR, compile_spec, load_spec
+
+
+def palette_colors(palette: str) -> np.ndarray:
+    """ Return the distinct swatch colors of a palette spec as an (N, 3)
+    uint8 array.
+
+    Args:
+        palette: Name of a spec in SPEC_DIR, or a spec file name.
+    """
+    if not os.path.exists(palette):
+        palette = os.path.join(SPEC_DIR, palette + '.json')
+    colors = compile_spec(load_spec(palette))[2]
+    return np.unique(colors, axis=0)
+
+
+# Lookup tables kept in memory when the cache directory isn't writable,
+# keyed by file name.
+_memory_tables = {}
+
+
+def swatch_lookup_table(colors: np.ndarray) -> np.ndarray:
+    """ Return the index of the nearest color for every 24 bit RGB color.
+
+    The table is a read-only (256, 256, 256) uint8 array indexed by
+    [red, green, blue], built on first use and memory-mapped after that.
+    If the cache directory can't be written the table is kept in memory.
+    """
+    if len(colors) > 256:
+        raise ValueError('at most 256 palette colors are supported')
+    digest = hashlib.sha1(np.ascontiguousarray(colors, np.uint8).tobytes())
+    filename = os.path.join(munsell.CACHE_DIR,
+                            'rgb_to_swatch_' + digest.hexdigest() + '.npy')
+    if filename in _memory_tables:
+        return _memory_tables[filename]
+    if os.path.exists(filename):
+        return np.load(filename, mmap_mode='r')
+
+    temp_filename = filename + '.' + str(os.getpid()) + '.tmp'
+    try:
+        os.makedirs(munsell.CACHE_DIR, exist_ok=True)
+        table = np.lib.format.open_memmap(temp_filename, mode='w+',
+                                          dtype=np.uint8,
+                                          shape=(256, 256, 256))
+    except OSError:
+        # E.g. a read-only checkout, keep the table in memory.
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        table = np.empty((256, 256, 256), dtype=np.uint8)
+    _fill_swatch_table(table, colors)
+    if isinstance(table, np.memmap):
+        table.flush()
+        del table
+        os.replace(temp_filename, filename)
+        return np.load(filename, mmap_mode='r')
+    table.flags.writeable = False
+    _memory_tables[filename] = table
+    return table
+
+
+def _fill_swatch_table(table: np.ndarray, colors: np.ndarray):
+    """ Compute the nearest color of every 24 bit color into table. """
+    from scipy.spatial import cKDTree
+    tree = cKDTree(colors.astype(np.float64))
+    green, blue = np.meshgrid(np.arange(256), np.arange(256), indexing='ij')
+    for red in range(256):
+        rgb = np.stack((np.full(green.size, red), green.ravel(),
+                        blue.ravel()), axis=1)
+        _, nearest = tree.query(rgb, workers=-1)
+        table[red] = nearest.reshape(256, 256)
+
+
+def quantize(image: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """ Replace each pixel of an HxWx3 uint8 image by its nearest color. """
+    table = swatch_lookup_table(colors).reshape(-1)
+    codes = ((image[..., 0].astype(np.uint32) << 16) |
+             (image[..., 1].astype(np.uint32) << 8) | image[..., 2])
+    return np.take(colors, np.take(table, codes), axis=0)
+
+
+def dither(image: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """ Quantize an HxWx3 uint8 image to colors with Floyd-Steinberg error
+    diffusion.
+
+    A pixel's error is spread to its right neighbor and the three pixels
+    below it, so pixel (y, x) only depends on pixels processed earlier on
+    the line x + 2y = constant. All pixels on such a line are independent,
+    so they are processed together, sweeping the line across the image.
+    """
+    table = swatch_lookup_table(colors)
+    height, width = image.shape[:2]
+    work = image.reshape(-1, 3).astype(np.float32)
+    result = np.empty((height * width, 3), dtype=np.uint8)
+    palette = colors.astype(np.float32)
+
+    # Error diffusion kernel: (row offset, column offset, weight).
+    kernel = ((0, 1, 7 / 16), (1, -1, 3 / 16), (1, 0, 5 / 16),
+              (1, 1, 1 / 16))
+    rows = np.arange(height)
+    for step in range(width + 2 * (height - 1)):
+        # Pixels (y, x) with x + 2y == step.
+        first = max(0, (step - width + 2) // 2)
+        last = min(height - 1, step // 2)
+        y = rows[first:last + 1]
+        x = step - 2 * y
+        index = y * width + x
+
+        old = work[index]
+        rgb = np.clip(np.rint(old), 0, 255).astype(np.intp)
+        nearest = table[rgb[:, 0], rgb[:, 1], rgb[:, 2]]
+        result[index] = colors[nearest]
+        error = old - palette[nearest]
+        for dy, dx, weight in kernel:
+            inside = (y + dy < height) & (x + dx >= 0) & (x + dx < width)
+            target = index[inside] + dy * width + dx
+            work[target] += weight * error[inside]
+    return result.reshape(image.shape)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Quantize an image to a palette.')
+    parser.add_argument('image', help='image file')
+    parser.add_argument('palette', help='palette spec name or file')
+    parser.add_argument('--dither', action='store_true',
+                        help='use Floyd-Steinberg error diffusion')
+    parser.add_argument('--output', help='output file name')
+    args = parser.parse_args()
+
+    colors = palette_colors(args.palette)
+    image = np.asarray(Image.open(args.image).convert('RGB'))
+    quantized = (dither if args.dither else quantize)(image, colors)
+    output = args.output
+    if output is None:
+        root, ext = os.path.splitext(args.image)
+        palette_name = os.path.splitext(os.path.basename(args.palette))[0]
+        output = root + '_' + palette_name + ext
+    Image.fromarray(quantized).save(output)
+    print('file', output, 'written')
@@ -59,9 +59,9 @@ above. Two palettes are generated, one for dark skin, one for light skin.
 Darker or lighter palettes could also be generated
 
 """
-from typing import Tuple
-from tkinter import Tk, Canvas, PhotoImage, mainloop
+import os
 from color import munsell
+from color.swatches import PALETTE_DIR, new_palette, paint_swatch, save_palette
 
 # Chroma scales, indexed by Munsell value (0 through 10)
 #THESE HAVE BEEN REPLACED BY VALUES PICKED OFF A PHOTO
@@ -82,31 +82,11 @@ PALETTE_WIDTH = PALETTE_COLUMNS * SWATCH_SIZE
 PALETTE_HEIGHT = PALETTE_ROWS * SWATCH_SIZE
 
 # Skin palette files.
-PALE_FILE = '../palettes/pale_skin_palette.png'
-DARK_FILE = '../palettes/dark_skin_palette.png'
-
-
-def paint_swatch(image: PhotoImage, row: int, column: int,
-                 color: Tuple[int, int, int]):
-    """ Paint a color swatch on the palette in (row, column). """
-    if column < 0 or column >= PALETTE_COLUMNS:
-        raise ValueError('bad column')
-    if row < 0 or row >= PALETTE_ROWS:
-        raise ValueError('bad row')
-    x_start = column * SWATCH_SIZE
-    y_start = row * SWATCH_SIZE
-    for x in range(x_start, x_start + SWATCH_SIZE - 1):
-        for y in range(y_start, y_start + SWATCH_SIZE - 1):
-            image.put("#%02x%02x%02x" % color, (x, y))
-
-
-window = Tk()
-window.title('Skin & Hair Palette')
-canvas = Canvas(window, width=PALETTE_WIDTH, height=PALETTE_HEIGHT, bg='#000000')
-canvas.pack()
-img = PhotoImage(width=PALETTE_WIDTH, height=PALETTE_HEIGHT)
-canvas.create_image((PALETTE_WIDTH // 2, PALETTE_HEIGHT // 2), image=img, state='normal')
-canvas.image = img  # To prevent garbage collection
+PALE_FILE = os.path.join(PALETTE_DIR, 'pale_skin_palette.png')
+DARK_FILE = os.path.join(PALETTE_DIR, 'dark_skin_palette.png')
+
+
+img = new_palette(PALETTE_ROWS, PALETTE_COLUMNS, SWATCH_SIZE)
 
 for scale in (pale_chroma, dark_chroma):
     file = PALE_FILE if scale == pale_chroma else DARK_FILE
@@ -119,7 +99,5 @@ for scale in (pale_chroma, dark_chroma):
                 chroma = 0
             column = value - 1
             rgb_color = munsell.to_rgb(hue, value, chroma)
-            paint_swatch(img, row, column, rgb_color)
-    canvas.image.write(file, format='png')
-
-mainloop()
+            paint_swatch(img, row, column, rgb_color, SWATCH_SIZE)
+    save_palette(img, file)
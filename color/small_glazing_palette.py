@@ -24,9 +24,9 @@ Palette layout:
               +----+----+----+----+----+----+----+----+----+----+
 
 """
-from typing import Tuple
-from tkinter import Tk, Canvas, PhotoImage, mainloop
+import os
 from color import munsell
+from color.swatches import PALETTE_DIR, new_palette, paint_swatch, save_palette
 
 
 # Supported Munsell hues (a quarter of the total), ordered clockwise.
@@ -47,41 +47,17 @@ PALETTE_WIDTH = PALETTE_COLUMNS * SWATCH_SIZE
 PALETTE_HEIGHT = PALETTE_ROWS * SWATCH_SIZE
 
 
-def paint_swatch(image: PhotoImage, row: int, column: int,
-                 color: Tuple[int, int, int]):
-    """ Paint a color swatch on the palette in (row, column). """
-    if column < 0 or column >= PALETTE_COLUMNS:
-        raise ValueError('bad column')
-    if row < 0 or row >= PALETTE_ROWS:
-        raise ValueError('bad row')
-    x_start = column * SWATCH_SIZE
-    y_start = row * SWATCH_SIZE
-    for x in range(x_start, x_start + SWATCH_SIZE - 1):
-        for y in range(y_start, y_start + SWATCH_SIZE - 1):
-            image.put("#%02x%02x%02x" % color, (x, y))
-
-
-window = Tk()
-window.title('Color Palette')
-canvas = Canvas(window, width=PALETTE_WIDTH, height=PALETTE_HEIGHT, bg='#000000')
-canvas.pack()
-
 # Include chromas in file name for documentation.
-file = '../palettes/munsell_chromas'
+file = os.path.join(PALETTE_DIR, 'munsell_chromas')
 for chroma in chromas:
     file += '_' + str(chroma)
 file += '.png'
 print('creating', file)
-img = PhotoImage(width=PALETTE_WIDTH, height=PALETTE_HEIGHT)
-canvas.create_image((PALETTE_WIDTH // 2, PALETTE_HEIGHT // 2), image=img,
-                    state='normal')
-canvas.image = img  # To prevent garbage collection
+img = new_palette(PALETTE_ROWS, PALETTE_COLUMNS, SWATCH_SIZE)
 for column, hue in enumerate(hues):
     for row, chroma in enumerate(chromas):
         rgb_color = munsell.to_rgb(hue, value, chroma)
         if rgb_color is not None:
-            paint_swatch(img, row, column, rgb_color)
-canvas.image.write(file, format='png')
+            paint_swatch(img, row, column, rgb_color, SWATCH_SIZE)
+save_palette(img, file)
 print('done.')
-
-mainloop()
@@ -69,9 +69,9 @@ on the canvas:
 
 
 """
-from typing import Tuple
-from tkinter import Tk, Canvas, PhotoImage, mainloop
+import os
 from color import munsell
+from color.swatches import PALETTE_DIR, new_palette, paint_swatch, save_palette
 
 
 # Hues. "gray" is a dummy hue for grayscale with chroma 0 (gray has no hue).
@@ -105,31 +105,9 @@ PALETTE_WIDTH = PALETTE_COLUMNS * SWATCH_SIZE
 PALETTE_HEIGHT = PALETTE_ROWS * SWATCH_SIZE
 
 
-def paint_swatch(image: PhotoImage, row: int, column: int,
-                 color: Tuple[int, int, int]):
-    """ Paint a color swatch on the palette in (row, column). """
-    if column < 0 or column >= PALETTE_COLUMNS:
-        raise ValueError('bad column')
-    if row < 0 or row >= PALETTE_ROWS:
-        raise ValueError('bad row')
-    x_start = column * SWATCH_SIZE
-    y_start = row * SWATCH_SIZE
-    for x in range(x_start, x_start + SWATCH_SIZE - 1):
-        for y in range(y_start, y_start + SWATCH_SIZE - 1):
-            image.put("#%02x%02x%02x" % color, (x, y))
-
-
-window = Tk()
-window.title('Soft Palette')
-canvas = Canvas(window, width=PALETTE_WIDTH, height=PALETTE_HEIGHT, bg='#000000')
-canvas.pack()
-
-file = '../palettes/soft_color_palette.png'
+file = os.path.join(PALETTE_DIR, 'soft_color_palette.png')
 print('creating', file)
-img = PhotoImage(width=PALETTE_WIDTH, height=PALETTE_HEIGHT)
-canvas.create_image((PALETTE_WIDTH // 2, PALETTE_HEIGHT // 2), image=img,
-                    state='normal')
-canvas.image = img  # To prevent garbage collection
+img = new_palette(PALETTE_ROWS, PALETTE_COLUMNS, SWATCH_SIZE)
 
 for row in range(PALETTE_ROWS):
     print('ROW --------------------------------')
@@ -141,10 +119,8 @@ for row in range(PALETTE_ROWS):
         print('hue value chroma', hue, value, chroma)
         rgb_color = munsell.to_rgb(hue, value, chroma)
         if rgb_color is not None:
-            paint_swatch(img, row, col, rgb_color)
+            paint_swatch(img, row, col, rgb_color, SWATCH_SIZE)
         else:
             print('missing rgb_color!!!')
-canvas.image.write(file, format='png')
+save_palette(img, file)
 print('done.')
-
-mainloop()
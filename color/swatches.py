@@ -0,0 +1,60 @@
+""" Rendering of color palettes as grids of swatches.
+
+A palette image is a NumPy array of rows x columns swatches, each a square
+of SWATCH_SIZE pixels less a one pixel gap on its right and bottom. Palettes
+are written with PIL, so no display is needed.
+
+"""
+from typing import Tuple
+import os
+import numpy as np
+from PIL import Image
+
+
+# Directory where the palette files are kept.
+PALETTE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'palettes')
+
+
+def new_palette(rows: int, columns: int, swatch_size: int,
+                background: Tuple[int, int, int] = None) -> np.ndarray:
+    """ Create an empty palette image.
+
+    Args:
+        rows: Number of swatch rows.
+        columns: Number of swatch columns.
+        swatch_size: Width and height of a swatch in pixels, including the gap.
+        background: Color of the background. If None, the palette is an RGBA
+            image with a transparent background, otherwise an RGB image.
+
+    Returns:
+        uint8 array of shape (rows * swatch_size, columns * swatch_size, 3 or 4).
+    """
+    height = rows * swatch_size
+    width = columns * swatch_size
+    if background is None:
+        return np.zeros((height, width, 4), dtype=np.uint8)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:, :] = background
+    return image
+
+
+def paint_swatch(image: np.ndarray, row: int, column: int,
+                 color: Tuple[int, int, int], swatch_size: int):
+    """ Paint a color swatch on the palette in (row, column). """
+    if column < 0 or column >= image.shape[1] // swatch_size:
+        raise ValueError('bad column')
+    if row < 0 or row >= image.shape[0] // swatch_size:
+        raise ValueError('bad row')
+    x_start = column * swatch_size
+    y_start = row * swatch_size
+    swatch = image[y_start:y_start + swatch_size - 1,
+                   x_start:x_start + swatch_size - 1]
+    swatch[..., :3] = color
+    if image.shape[2] == 4:
+        swatch[..., 3] = 255
+
+
+def save_palette(image: np.ndarray, filename: str):
+    """ Write a palette image to a file, e.g. a PNG. """
+    Image.fromarray(image).save(filename)
@@ -0,0 +1,35 @@
+""" Tests of Munsell to RGB conversion.
+
+Run with: python -m pytest color, or python -m unittest color.test_munsell
+
+"""
+import unittest
+import numpy as np
+from color import munsell
+
+
+class TestToRGB(unittest.TestCase):
+
+    def test_float_value(self):
+        self.assertEqual(munsell.to_rgb('5R', 5.0, 4),
+                         munsell.to_rgb('5R', 5, 4))
+
+    def test_lists(self):
+        np.testing.assert_array_equal(
+            munsell.to_rgb([0, 1], [5, 5], [2, 4]),
+            [munsell.to_rgb(0, 5, 2), munsell.to_rgb(1, 5, 4)])
+
+    def test_negative_chroma(self):
+        for hue, value in (('5R', 5), ('10GY', 3), ('2.5PB', 8)):
+            neutral = munsell.to_rgb(hue, value, 0)
+            self.assertEqual(munsell.to_rgb(hue, value, -1), neutral)
+            self.assertEqual(munsell.to_rgb(hue, value, -0.5), neutral)
+            self.assertEqual(munsell.to_rgb(hue, value, -1, continuous=True),
+                             munsell.to_rgb(hue, value, 0, continuous=True))
+        np.testing.assert_array_equal(
+            munsell.to_rgb(np.array([0, 0]), 5, [-2, 0]),
+            [munsell.to_rgb(0, 5, 0)] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
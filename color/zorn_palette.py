@@ -61,14 +61,13 @@ Within each color, values are arranged from 1 to 9:
 
 
 """
-from typing import Tuple
-from tkinter import Tk, Canvas, PhotoImage, mainloop
+import os
 from color import munsell
-import sys
+from color.swatches import PALETTE_DIR, new_palette, paint_swatch, save_palette
 
 
 # Output palette file
-file = '../palettes/zorn_palette.png'
+file = os.path.join(PALETTE_DIR, 'zorn_palette.png')
 
 # Hues, ordered from top to bottom by row.
 gray = '10R'   # Dummy hue for grayscale.
@@ -129,40 +128,9 @@ PALETTE_WIDTH = PALETTE_COLUMNS * SWATCH_SIZE
 PALETTE_HEIGHT = PALETTE_ROWS * SWATCH_SIZE
 
 
-def paint_swatch(image: PhotoImage, row: int, column: int,
-                 color: Tuple[int, int, int]):
-    """ Paint a color swatch on the palette in (row, column). """
-    if column < 0 or column >= PALETTE_COLUMNS:
-        raise ValueError('bad column')
-    if row < 0 or row >= PALETTE_ROWS:
-        raise ValueError('bad row')
-
-    # Put a slight gap between values 5 and 6 for each color to make it easier
-    # to pick of the right value from the palette.
-    x_start = column * SWATCH_SIZE
-    #if column >= GAP_COLUMN:
-    #    x_start += GAP
-
-
-    y_start = row * SWATCH_SIZE
-    for x in range(x_start, x_start + SWATCH_SIZE - 1):
-        for y in range(y_start, y_start + SWATCH_SIZE - 1):
-            image.put("#%02x%02x%02x" % color, (x, y))
-
-
-window = Tk()
-window.title('General Palette')
-canvas = Canvas(window, width=PALETTE_WIDTH, height=PALETTE_HEIGHT, bg='#000000')
-canvas.pack()
-
 print('creating', file)
-img = PhotoImage(width=PALETTE_WIDTH, height=PALETTE_HEIGHT)
-canvas.create_image((PALETTE_WIDTH // 2, PALETTE_HEIGHT // 2), image=img,
-                    state='normal')
-canvas.image = img  # To prevent garbage collection
-
-# Paint palette background black
-img.put("{black}", (0, 0, PALETTE_WIDTH, PALETTE_HEIGHT))
+img = new_palette(PALETTE_ROWS, PALETTE_COLUMNS, SWATCH_SIZE,
+                  background=(0, 0, 0))
 
 for color_row in range(COLOR_ROWS):
     for color_col in range(COLOR_COLUMNS):
@@ -176,11 +144,9 @@ for color_row in range(COLOR_ROWS):
             rgb_color = munsell.to_rgb(hue, value, chroma)
             palette_col = color_col * len(values) + index
             if rgb_color is not None:
-                paint_swatch(img, color_row, palette_col, rgb_color)
+                paint_swatch(img, color_row, palette_col, rgb_color,
+                             SWATCH_SIZE)
             else:
                 print('missing rgb_color!!!')
-canvas.image.write(file, format='png')
+save_palette(img, file)
 print('done.')
-sys.exit(0)
-
-mainloop()
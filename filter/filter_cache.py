@@ -0,0 +1,105 @@
+"""
+Cache of frequency domain filters.
+
+Filters for large images are big (an 8K float64 filter is 512 MB) and slow
+enough to build that they are worth keeping, but not forever. A FilterCache
+keeps the most recently used filters in memory up to a byte budget, and can
+also store them as .npy files in a directory, from which they are memory
+mapped by later processes instead of being built again.
+
+Filters are keyed by a name, their shape and dtype, and whatever parameters
+they were built from. Cached filters are read-only.
+
+"""
+from typing import Callable, Hashable, Tuple
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import numpy as np
+
+
+class FilterCache:
+    """ LRU cache of filters, with an optional on-disk store.
+
+    Args:
+        max_bytes: Memory budget. The least recently used filters are dropped
+            to stay within it; a filter larger than the budget is not kept.
+        directory: Directory of the on-disk store, None for memory only.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30, directory: str = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype,
+            params: Hashable, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """ Return a cached filter, building it with build() if needed.
+
+        Args:
+            name: Kind of filter, e.g. 'whitening'.
+            shape: Shape of the filter.
+            dtype: dtype of the filter.
+            params: Any other parameters the filter depends on, e.g. a tuple.
+            build: Function without arguments that builds the filter.
+        """
+        key = (name, tuple(shape), np.dtype(dtype).str, params)
+        with self._lock:
+            if key in self._filters:
+                self._filters.move_to_end(key)
+                self.hits += 1
+                return self._filters[key]
+        self.misses += 1
+
+        filename = self._filename(key)
+        if filename is not None and os.path.exists(filename):
+            array = np.load(filename, mmap_mode='r')
+        else:
+            array = np.asarray(build(), dtype=dtype)
+            if array.shape != tuple(shape):
+                raise ValueError('filter has shape ' + str(array.shape) +
+                                 ', expected ' + str(tuple(shape)))
+            if filename is not None:
+                self._save(filename, array)
+            array.setflags(write=False)
+        self._insert(key, array)
+        return array
+
+    def clear(self):
+        """ Drop all filters from memory. The on-disk store is kept. """
+        with self._lock:
+            self._filters.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._filters)
+
+    def _filename(self, key) -> str:
+        if self.directory is None:
+            return None
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, key[0] + '_' + digest + '.npy')
+
+    def _save(self, filename: str, array: np.ndarray):
+        # Write to a temporary file first, so that processes sharing the
+        # store never see a partial file.
+        os.makedirs(self.directory, exist_ok=True)
+        temp_filename = filename + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            np.save(f, array)
+        os.replace(temp_filename, filename)
+
+    def _insert(self, key, array: np.ndarray):
+        with self._lock:
+            if key in self._filters or array.nbytes > self.max_bytes:
+                return
+            self._filters[key] = array
+            self.nbytes += array.nbytes
+            while self.nbytes > self.max_bytes:
+                _, dropped = self._filters.popitem(last=False)
+                self.nbytes -= dropped.nbytes
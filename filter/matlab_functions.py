@@ -19,51 +19,39 @@ limitations under the License.
 
 """
 import numpy as np
-import math
 from typing import Tuple
 
 
-def index_range(first: int, step: int, last: int) -> np.ndarray:
+def index_range(first: int, step: int, last: int, dtype=None) -> np.ndarray:
     if last <= first or step <= 0:
         raise ValueError('illegal arguments')
+    return np.arange(first, last, step, dtype=dtype)
 
-    result = []
-    for i in range(first, last, step):
-        result.append(i)
-    return np.array(result)
 
-
-def meshgrid(x_domain: np.ndarray, y_domain: np.ndarray) -> Tuple[np.ndarray]:
+def meshgrid(x_domain: np.ndarray, y_domain: np.ndarray,
+             dtype=np.float64) -> Tuple[np.ndarray]:
     if len(x_domain.shape) != 1 or len(y_domain.shape) != 1:
         raise ValueError('inputs must be 1D arrays')
 
     columns = x_domain.shape[0]
     rows = y_domain.shape[0]
-    x = np.zeros((rows, columns))
-    for row in range(rows):
-        for col in range(columns):
-            x[row, col] = x_domain[col]
-
-    y = np.zeros((rows, columns))
-    for row in range(rows):
-        for col in range(columns):
-            y[row, col] = y_domain[row]
+    x = np.empty((rows, columns), dtype=dtype)
+    x[:, :] = x_domain[np.newaxis, :]
+    y = np.empty((rows, columns), dtype=dtype)
+    y[:, :] = y_domain[:, np.newaxis]
     return x, y
 
 
-def cart2pol(fx: np.ndarray, fy: np.ndarray) -> Tuple[np.ndarray]:
+def cart2pol(fx: np.ndarray, fy: np.ndarray,
+             dtype=np.float64) -> Tuple[np.ndarray]:
     if len(fx.shape) != 2 or len(fy.shape) != 2:
         raise ValueError('inputs must be 2D arrays')
     if fx.shape != fy.shape:
         raise ValueError('inputs must have the same shape')
-    theta = np.zeros(fx.shape)
-    rho = np.zeros(fx.shape)
-    for row in range(fx.shape[0]):
-        for col in range(fx.shape[1]):
-            x = fx[row, col]
-            y = fy[row, col]
-            theta[row, col] = math.atan2(-y, x)
-            rho[row, col] = math.sqrt(x * x + y * y)
+    x = fx.astype(dtype, copy=False)
+    y = fy.astype(dtype, copy=False)
+    theta = np.arctan2(-y, x)
+    rho = np.sqrt(x * x + y * y)
     return theta, rho
 
 
@@ -79,7 +67,3 @@ if __name__ == '__main__':
     print(theta)
     print()
     print(rho)
-
-
-
-
@@ -0,0 +1,81 @@
+""" Tests of the vectorized Matlab functions against the original
+element-by-element implementations.
+
+Run with: python -m pytest filter, or python -m unittest
+filter.test_matlab_functions
+
+"""
+import math
+import unittest
+import numpy as np
+from filter.matlab_functions import cart2pol, index_range, meshgrid
+
+
+def index_range_loop(first, step, last):
+    return np.array([i for i in range(first, last, step)])
+
+
+def meshgrid_loop(x_domain, y_domain):
+    x = np.zeros((y_domain.shape[0], x_domain.shape[0]))
+    y = np.zeros((y_domain.shape[0], x_domain.shape[0]))
+    for row in range(x.shape[0]):
+        for col in range(x.shape[1]):
+            x[row, col] = x_domain[col]
+            y[row, col] = y_domain[row]
+    return x, y
+
+
+def cart2pol_loop(fx, fy):
+    theta = np.zeros(fx.shape)
+    rho = np.zeros(fx.shape)
+    for row in range(fx.shape[0]):
+        for col in range(fx.shape[1]):
+            x = fx[row, col]
+            y = fy[row, col]
+            theta[row, col] = math.atan2(-y, x)
+            rho[row, col] = math.sqrt(x * x + y * y)
+    return theta, rho
+
+
+class TestMatlabFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.f = index_range(-64, 1, 64)
+        self.g = index_range(-5, 2, 30)
+
+    def test_index_range(self):
+        for first, step, last in ((1, 3, 15), (-64, 1, 64), (-7, 2, 9)):
+            np.testing.assert_array_equal(index_range(first, step, last),
+                                          index_range_loop(first, step, last))
+
+    def test_index_range_illegal(self):
+        with self.assertRaises(ValueError):
+            index_range(5, 1, 5)
+        with self.assertRaises(ValueError):
+            index_range(1, 0, 5)
+
+    def test_meshgrid(self):
+        for a, b in zip(meshgrid(self.f, self.g),
+                        meshgrid_loop(self.f, self.g)):
+            self.assertEqual(a.dtype, b.dtype)
+            np.testing.assert_array_equal(a, b)
+
+    def test_cart2pol(self):
+        fx, fy = meshgrid(self.f, self.g)
+        theta, rho = cart2pol(fx, fy)
+        theta_loop, rho_loop = cart2pol_loop(fx, fy)
+        self.assertEqual(theta.dtype, np.float64)
+        self.assertEqual(rho.dtype, np.float64)
+        # NumPy's arctan2 may differ from math.atan2 in the last bit.
+        np.testing.assert_allclose(theta, theta_loop, rtol=0, atol=1e-15)
+        np.testing.assert_array_equal(rho, rho_loop)
+
+    def test_cart2pol_float32(self):
+        fx, fy = meshgrid(self.f, self.g)
+        for a, b in zip(cart2pol(fx, fy, np.float32), cart2pol_loop(fx, fy)):
+            self.assertEqual(a.dtype, np.float32)
+            np.testing.assert_allclose(a, b, rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
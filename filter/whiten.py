@@ -25,65 +25,106 @@ See the License for the specific language governing permissions and
 limitations under the License.
 
 """
+from typing import Tuple
+import argparse
 import numpy as np
-import math
-from .matlab_functions import index_range, meshgrid, cart2pol
-from numpy.fft import fft2, ifft2, fftshift, ifftshift
-
-
-# Dictionary of spectral whitening filters:  shape -> filter
-_spectral_filter_cache = {}
-
-
-def whitening_filter(size: int) -> np.ndarray:
-    # Create whitening filter in the frequency domain.
-    # Frequencies run from -N/2 to N/2 - 1, inclusive
-    f = index_range(-(size // 2), 1, size // 2)
-    fx, fy = meshgrid(f, f)
-    theta, rho = cart2pol(fx, fy)
+from scipy import fft as sp_fft
+from .filter_cache import FilterCache
+
+
+# Cache of whitening filters. Replace it to change the memory budget or to
+# keep the filters on disk, e.g. FilterCache(256 << 20, 'filter_cache').
+filter_cache = FilterCache()
+
+
+def whitening_filter(size, dtype=np.float64,
+                     half: bool = False) -> np.ndarray:
+    """ Create the whitening filter in the frequency domain, in the layout
+    of fft2 (zero frequency at [0, 0]).
+
+    Args:
+        size: Width and height of a square image, or (height, width). For
+            rectangular images frequencies are measured in cycles per the
+            longer side, so the filter is still circular.
+        dtype: Floating point type of the filter.
+        half: If True, return only the columns for non-negative horizontal
+            frequencies, shape (height, width // 2 + 1), matching the output
+            of rfft2. The filter is real and symmetric, so nothing is lost.
+    """
+    height, width = (size, size) if np.isscalar(size) else size
+    size = max(height, width)
+    # Frequencies run from -N/2 to N/2 - 1, inclusive, here in fft order.
+    fy = np.fft.fftfreq(height, 1.0 / size).astype(dtype)
+    if half:
+        fx = np.fft.rfftfreq(width, 1.0 / size).astype(dtype)
+    else:
+        fx = np.fft.fftfreq(width, 1.0 / size).astype(dtype)
+    rho = np.sqrt(fy[:, np.newaxis] ** 2 + fx[np.newaxis, :] ** 2)
 
     # Window the 1/f function with a circular Gaussian to (1) clip the
     # corners of the frequency domain; and (2) low-pass filter the highest
     # frequencies to minimize the effects of noise.
-    gauss = np.zeros((size, size))
-
-    def sq(x: float):
-        return x * x
-
-    for row in range(size):
-        for col in range(size):
-            gauss[row, col] = math.exp(-0.5 * sq(rho[row, col] / \
-                                                 (0.7 * size // 2)))
-    gauss = gauss * rho
-    max_value = np.max(gauss)
-    gauss /= max_value
-    return fftshift(gauss)
-
-
-def whiten(image: np.ndarray) -> np.ndarray:
+    gauss = rho / (0.7 * size // 2)
+    np.square(gauss, out=gauss)
+    gauss *= -0.5
+    np.exp(gauss, out=gauss)
+    gauss *= rho
+    gauss /= np.max(gauss)
+    return gauss
+
+
+def whiten(image: np.ndarray, out: np.ndarray = None,
+           workers: int = -1) -> np.ndarray:
+    """ Whiten a grayscale (HxW) or color (HxWx3) image.
+
+    All channels are transformed together with real FFTs over the spatial
+    axes, so only the half-plane spectrum is ever stored. The computation
+    is done in the precision of the image, float32 or float64.
+
+    Args:
+        image: The image to whiten.
+        out: Optional preallocated array for the result, of the same shape
+            as the image. May be the image itself.
+        workers: Number of FFT worker threads, -1 for all cores.
+
+    Returns:
+        The whitened image (out, if given).
+    """
     if image.dtype not in [np.float32, np.float64]:
         raise ValueError('image must be a "float" image')
-    if len(image.shape) == 2:
-        image_fft = fft2(image)
-        return ifft2(whiten_spectral(image_fft)).real
-    elif len(image.shape) == 3:
-        red_fft = fft2(image[:, :, 0])
-        green_fft = fft2(image[:, :, 1])
-        blue_fft = fft2(image[:, :, 2])
+    if len(image.shape) not in (2, 3):
+        raise ValueError('image must be 2D, color or grayscale')
+    if out is None:
+        out = np.empty(image.shape, dtype=image.dtype)
+    elif out.shape != image.shape:
+        raise ValueError('out must have the shape of the image')
 
+    _whiten_ac(image, out, workers)
+    if len(image.shape) == 3:
         # Whitening removes DC component. Add 0.5 to approximate that for
         # color images.
-        return np.stack(
-            (ifft2(whiten_spectral(red_fft)).real + 0.5,
-             ifft2(whiten_spectral(green_fft)).real + 0.5,
-             ifft2(whiten_spectral(blue_fft)).real + 0.5
-             ),
-            axis=2
-        )
-    else:
-        raise ValueError('image must be 2D, color or grayscale')
+        out += 0.5
+    return out
 
 
+def _whiten_ac(image: np.ndarray, out: np.ndarray, workers: int):
+    """ Whiten an image into out, without restoring any DC component. """
+    white_filter = _whitening_filter(image.shape[:2], image.dtype, half=True)
+    if len(image.shape) == 3:
+        white_filter = white_filter[:, :, np.newaxis]
+    spectrum = sp_fft.rfft2(image, axes=(0, 1), workers=workers)
+    spectrum *= white_filter
+    out[...] = sp_fft.irfft2(spectrum, s=image.shape[:2], axes=(0, 1),
+                             overwrite_x=True, workers=workers)
+
+
+def _whitening_filter(shape: Tuple[int, int], dtype,
+                      half: bool = False) -> np.ndarray:
+    """ Cached whitening_filter(shape, dtype, half). """
+    height, width = shape
+    filter_shape = (height, width // 2 + 1 if half else width)
+    return filter_cache.get('whitening', filter_shape, dtype, (height, width),
+                            lambda: whitening_filter(shape, dtype, half))
 
 
 def whiten_spectral(image: np.ndarray) -> np.ndarray:
@@ -91,11 +132,81 @@ def whiten_spectral(image: np.ndarray) -> np.ndarray:
         raise ValueError('Image must be in the frequency domain.')
     if len(image.shape) != 2:
         raise ValueError('Image must be 2D.')
-    if image.shape[0] != image.shape[1]:
-        raise ValueError('Image must be square.')
-    size = image.shape[0]
-    key = image.shape
-    if key not in _spectral_filter_cache:
-        _spectral_filter_cache[image.shape] = whitening_filter(image.shape[0])
-    white_filter = _spectral_filter_cache[image.shape]
-    return white_filter * image
+    dtype = np.float32 if image.dtype == np.complex64 else np.float64
+    return _whitening_filter(image.shape, dtype) * image
+
+
+def _tile_window(tile_size: int, dtype) -> np.ndarray:
+    """ Square root of a periodic Hann window. Applied before and after
+    whitening, tiles overlapping by half sum to one. """
+    return np.sin(np.pi * np.arange(tile_size) / tile_size).astype(dtype)
+
+
+def whiten_tiled(source, destination: str, tile_size: int = 1024,
+                 workers: int = -1) -> np.ndarray:
+    """ Whiten an image too large for memory, tile by tile.
+
+    The image is cut into square tiles overlapping by half. Each tile is
+    windowed, whitened, windowed again and added to the output (weighted
+    overlap-add), so the tiles blend without seams. The image is extended
+    by reflection at its borders. Memory use depends on the tile size only;
+    only the lowest frequencies, below one cycle per tile, are lost.
+
+    Args:
+        source: Grayscale (HxW) or color (HxWx3) image, float or uint8
+            (scaled to [0, 1]), or the name of a .npy file holding one, which
+            is memory-mapped.
+        destination: Name of the .npy file the float32 result is written to.
+        tile_size: Size of the tiles, even.
+        workers: Number of FFT worker threads, -1 for all cores.
+
+    Returns:
+        The result, memory-mapped.
+    """
+    if isinstance(source, str):
+        source = np.load(source, mmap_mode='r')
+    if len(source.shape) not in (2, 3):
+        raise ValueError('image must be 2D, color or grayscale')
+    if tile_size % 2:
+        raise ValueError('tile size must be even')
+    scale = 1 / 255 if source.dtype == np.uint8 else 1
+    height, width = source.shape[:2]
+    result = np.lib.format.open_memmap(destination, mode='w+',
+                                       dtype=np.float32, shape=source.shape)
+
+    window = _tile_window(tile_size, np.float32)
+    window = window[:, np.newaxis] * window[np.newaxis, :]
+    if len(source.shape) == 3:
+        window = window[:, :, np.newaxis]
+    hop = tile_size // 2
+    tile = np.empty((tile_size, tile_size) + source.shape[2:], np.float32)
+    for y in range(-hop, height, hop):
+        for x in range(-hop, width, hop):
+            # Read the part of the tile inside the image, reflecting it at
+            # the image borders to fill the rest.
+            y0, y1 = max(y, 0), min(y + tile_size, height)
+            x0, x1 = max(x, 0), min(x + tile_size, width)
+            pad = [(y0 - y, y + tile_size - y1), (x0 - x, x + tile_size - x1)]
+            pad += [(0, 0)] * (len(source.shape) - 2)
+            tile[...] = np.pad(np.asarray(source[y0:y1, x0:x1]) * scale,
+                               pad, mode='symmetric')
+            tile *= window
+            _whiten_ac(tile, tile, workers)
+            tile *= window
+            result[y0:y1, x0:x1] += tile[y0 - y:y1 - y, x0 - x:x1 - x]
+        if len(source.shape) == 3:
+            # Rows above the next tile row are final.
+            result[max(y, 0):max(y + hop, 0)] += 0.5
+    result.flush()
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Whiten a large image stored as a .npy file.')
+    parser.add_argument('source', help='HxW or HxWx3 .npy image')
+    parser.add_argument('destination', help='.npy file for the result')
+    parser.add_argument('--tile', type=int, default=1024, help='tile size')
+    args = parser.parse_args()
+    whiten_tiled(args.source, args.destination, args.tile)
+    print('file', args.destination, 'written')
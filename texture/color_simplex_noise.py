@@ -1,16 +1,13 @@
 """
-Poor man's color simplex noise generator.
+Color simplex noise generator.
 
-Takes a grayscale simplex noise image file and creates a color version.
-Algorithm:
-  red: take input simplex image and apply to R channel
-  green: rotate input image 90 degrees and apply to G channel
-  blue: rotate input image 180 degress and apply to B channel
+Each of the red, green and blue channels is an independent 16 octave simplex
+noise field from texture.fractal_noise, with seeds 0, 1 and 2.
 
 """
 import numpy as np
 import matplotlib.pyplot as plt
-from PIL import Image
+from texture.fractal_noise import simplex
 
 
 def rgb2gray(rgb):
@@ -18,16 +15,15 @@ def rgb2gray(rgb):
 
 
 if __name__ == '__main__':
-    filename = '../data/simplex_noise_16_octaves.jpg'
-    outfile =  '../data/color_simplex_noise_16_octaves.jpg'
-    image = np.asarray(Image.open(filename))  # [:, :]
+    outfile = '../data/color_simplex_noise_16_octaves.jpg'
+    size = (1024, 1024)
 
-    # Create red, green, and blue channels from grayscale by rotation.
-    red = image[:, :, 0]
-    green = np.rot90(red)
-    blue = np.rot90(green)
+    # Create red, green, and blue channels from independent noise.
+    channels = [simplex(size, scale=256, octaves=16, persistence=0.5,
+                        seed=seed) for seed in range(3)]
 
     # Combine into a color image file and write it out.
-    color_simplex = np.stack((red, green, blue), axis=2)
+    color_simplex = np.stack(channels, axis=2)
+    color_simplex = (color_simplex + 1) / 2
     plt.imsave(outfile, color_simplex)
-    print(image.shape, color_simplex.shape)
+    print(color_simplex.shape)
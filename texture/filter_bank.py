@@ -0,0 +1,126 @@
+""" Spectral envelopes for noise synthesis.
+
+Every envelope is a real, radially symmetric amplitude spectrum in the
+half-plane layout of rfft2 (zero frequency at [0, 0]), zero at DC:
+
+    olshausen           Bruno Olshausen's whitening filter, see filter.whiten.
+                        Approximates the response of the human visual system.
+    inverse_laplacian   Inverse of the 5 point discrete Laplacian, falls as
+                        1/f^2 at low frequencies.
+    power_law           f^power, e.g. 1/f for power -1.
+    gaussian_band       Gaussian ring exp(-(r - mu)^2 / (2 sigma^2)), r in units
+                        of the Nyquist frequency.
+
+Envelopes are cached per size, dtype and parameters. synthesize() shapes a
+Gaussian random field with an envelope, for any number of channels at once.
+
+"""
+from typing import Callable, Dict
+import math
+import numpy as np
+from scipy import fft as sp_fft
+from filter.filter_cache import FilterCache
+from filter.whiten import whitening_filter
+
+
+# Cache of envelopes.
+envelope_cache = FilterCache(256 << 20)
+
+
+def _frequencies(size: int, dtype):
+    """ Row and column frequencies of the half-plane, in cycles per image. """
+    fy = np.fft.fftfreq(size, 1.0 / size).astype(dtype)
+    fx = np.fft.rfftfreq(size, 1.0 / size).astype(dtype)
+    return fy[:, np.newaxis], fx[np.newaxis, :]
+
+
+def _olshausen(size: int, dtype) -> np.ndarray:
+    return whitening_filter(size, dtype, half=True)
+
+
+def _inverse_laplacian(size: int, dtype) -> np.ndarray:
+    fy, fx = _frequencies(size, dtype)
+    laplacian = (4 - 2 * np.cos(fy * dtype(2 * math.pi / size))
+                 - 2 * np.cos(fx * dtype(2 * math.pi / size)))
+    laplacian[0, 0] = 1
+    envelope = np.reciprocal(laplacian, out=laplacian)
+    envelope[0, 0] = 0
+    return envelope
+
+
+def _power_law(size: int, dtype, power: float = -1.0) -> np.ndarray:
+    fy, fx = _frequencies(size, dtype)
+    dist_sq = fy ** 2 + fx ** 2
+    dist_sq[0, 0] = 1
+    envelope = np.power(dist_sq, 0.5 * power, out=dist_sq)
+    envelope[0, 0] = 0
+    return envelope
+
+
+def _gaussian_band(size: int, dtype, sigma: float = 1.0,
+                   mu: float = 0.0) -> np.ndarray:
+    fy, fx = _frequencies(size, dtype)
+    radius = np.sqrt(fy ** 2 + fx ** 2) / dtype(size / 2)
+    envelope = np.exp(-(radius - dtype(mu)) ** 2 / dtype(2.0 * sigma ** 2))
+    envelope[0, 0] = 0
+    return envelope
+
+
+# Envelope name -> function(size, dtype, **params)
+ENVELOPES: Dict[str, Callable[..., np.ndarray]] = {
+    'olshausen': _olshausen,
+    'inverse_laplacian': _inverse_laplacian,
+    'power_law': _power_law,
+    'gaussian_band': _gaussian_band,
+}
+
+
+def envelope(name: str, size: int, dtype=np.float32, **params) -> np.ndarray:
+    """ Return a cached envelope, shape (size, size // 2 + 1), read-only.
+
+    Args:
+        name: One of ENVELOPES.
+        size: Width and height of the noise.
+        dtype: float32 or float64.
+        params: Parameters of the envelope, e.g. power=-1.0 for power_law.
+    """
+    if name not in ENVELOPES:
+        raise ValueError('unknown envelope: ' + name)
+    dtype = np.dtype(dtype).type
+    key = tuple(sorted((k, float(v)) for k, v in params.items()))
+    return envelope_cache.get(name, (size, size // 2 + 1), dtype, key,
+                              lambda: ENVELOPES[name](size, dtype, **params))
+
+
+def synthesize(name: str, size: int, channels: int = None,
+               rng: np.random.Generator = None, dtype=np.float32,
+               **params) -> np.ndarray:
+    """ Make noise with the spectrum of an envelope.
+
+    A complex Gaussian field is multiplied by the envelope and transformed
+    with one real inverse FFT for all channels.
+
+    Args:
+        name: Envelope, one of ENVELOPES.
+        size: Width and height of the noise.
+        channels: Number of independent channels, None for a single 2D
+            field.
+        rng: Random generator, default is a new unseeded one.
+        dtype: float32 or float64.
+        params: Parameters of the envelope.
+
+    Returns:
+        Noise of shape (size, size) or (size, size, channels).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    dtype = np.dtype(dtype).type
+    amplitude = envelope(name, size, dtype, **params)
+    shape = amplitude.shape + (1 if channels is None else channels,)
+    spectrum = np.empty(shape, dtype=np.result_type(dtype, np.complex64))
+    spectrum.real = rng.standard_normal(shape, dtype=dtype)
+    spectrum.imag = rng.standard_normal(shape, dtype=dtype)
+    spectrum *= amplitude[:, :, np.newaxis]
+    noise = sp_fft.irfft2(spectrum, s=(size, size), axes=(0, 1),
+                          overwrite_x=True, workers=-1)
+    return noise[:, :, 0] if channels is None else noise
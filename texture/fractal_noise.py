@@ -0,0 +1,205 @@
+""" Seedable multi-octave Perlin and simplex noise.
+
+    perlin()     Improved Perlin gradient noise (Perlin 2002 fade curve).
+    simplex()    2D simplex noise (Perlin 2001, after Gustavson's notes).
+
+Both sum octaves of noise, each at twice the frequency of the last and
+persistence times its amplitude, like the texture generator the canned
+images in ../data were made with. Noise is evaluated over whole rows of
+pixels as arrays, a block of rows at a time to stay in cache, with blocks
+spread over threads.
+
+Pixel (row, column) of the result is noise at (column + offset[1],
+row + offset[0]) / scale, so fields can be rendered in strips or tiles
+and fit together exactly.
+
+"""
+from typing import Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import math
+import numpy as np
+
+
+# Simplex skew and unskew factors.
+_F2 = 0.5 * (math.sqrt(3.0) - 1.0)
+_G2 = (3.0 - math.sqrt(3.0)) / 6.0
+
+# Elements per block of rows.
+_BLOCK_SIZE = 1 << 16
+
+
+def _gradients(perm: np.ndarray, dtype) -> np.ndarray:
+    """ Unit gradients as complex numbers gx + i gy. Lattice point (ix, iy)
+    has the gradient at index perm[ix % 256] + iy % 256, so the lattice
+    repeats every 256. The table is long enough for iy up to 512. """
+    hashed = perm[np.arange(768) % 256] & 7
+    return np.exp(1j * (2 * math.pi / 8) * hashed) \
+        .astype(np.result_type(dtype, np.complex64))
+
+
+def _fade(t: np.ndarray) -> np.ndarray:
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _perlin_octave(x: np.ndarray, y: np.ndarray, perm: np.ndarray,
+                   dtype) -> np.ndarray:
+    """ Perlin noise on the grid x (columns) by y (rows), in [-1, 1]. """
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = (x - x0).astype(dtype)
+    fy = (y - y0).astype(dtype)[:, np.newaxis]
+    u = _fade(fx)
+    v = _fade(fy)
+
+    # The first part of the gradient hash is per column, the second per row.
+    gradients = _gradients(perm, dtype)
+    x0 = x0.astype(np.int64)
+    y0 = y0.astype(np.int64)[:, np.newaxis]
+
+    def corner(dy: int, dx: int) -> np.ndarray:
+        hashed = perm[(x0 + dx) % 256].astype(np.int32) + \
+            ((y0 + dy) % 256).astype(np.int32)
+        gradient = np.take(gradients, hashed)
+        dot = gradient.real * (fx - dx)
+        dot += gradient.imag * (fy - dy)
+        return dot
+
+    n00 = corner(0, 0)
+    n01 = corner(0, 1)
+    n01 -= n00
+    n01 *= u
+    n01 += n00
+    n10 = corner(1, 0)
+    n11 = corner(1, 1)
+    n11 -= n10
+    n11 *= u
+    n11 += n10
+    n11 -= n01
+    n11 *= v
+    n11 += n01
+    # The extremes of 2D Perlin noise are +-sqrt(1/2).
+    n11 *= dtype(math.sqrt(2.0))
+    return n11
+
+
+def _simplex_octave(x: np.ndarray, y: np.ndarray, perm: np.ndarray,
+                    dtype) -> np.ndarray:
+    """ Simplex noise on the grid x (columns) by y (rows), in [-1, 1]. """
+    # Skewed coordinates x + s and y + s, with s = (x + y) * F2, are each a
+    # sum of a per column and a per row term. The lattice repeats every 256
+    # cells, so the terms are reduced modulo 256 first.
+    x_terms = np.stack((x * (1 + _F2), x * _F2)) % 256
+    y_terms = np.stack((y * _F2, y * (1 + _F2))) % 256
+    x_terms = x_terms.astype(np.float32)[:, np.newaxis, :]
+    y_terms = y_terms.astype(np.float32)[:, :, np.newaxis]
+    fx = x_terms[0] + y_terms[0]
+    fy = x_terms[1] + y_terms[1]
+    i = np.floor(fx)
+    j = np.floor(fy)
+    fx -= i
+    fy -= j
+    fx = fx.astype(dtype, copy=False)
+    fy = fy.astype(dtype, copy=False)
+    i = i.astype(np.int32)
+    j = j.astype(np.int32)
+    # Unskew the position within the cell.
+    t = (fx + fy) * dtype(_G2)
+    x0 = fx - t
+    y0 = fy - t
+    # The middle corner is (1, 0) in the lower triangle of the skewed cell,
+    # else (0, 1).
+    lower = fx > fy
+    i1 = lower.astype(np.int32)
+    j1 = 1 - i1
+    lower = lower.astype(dtype)
+
+    # i and j are below 512, so perm is extended to 513 entries.
+    perm = np.tile(perm.astype(np.int32), 3)
+    gradients = _gradients(perm, dtype)
+    result = np.zeros(x0.shape, dtype=dtype)
+    for di, dj, cx, cy in ((0, 0, x0, y0),
+                           (i1, j1, x0 - lower + dtype(_G2),
+                            y0 + lower - dtype(1 - _G2)),
+                           (1, 1, x0 - dtype(1 - 2 * _G2),
+                            y0 - dtype(1 - 2 * _G2))):
+        falloff = dtype(0.5) - cx * cx - cy * cy
+        np.maximum(falloff, 0, out=falloff)
+        falloff *= falloff
+        falloff *= falloff
+        hashed = np.take(perm, i + di)
+        hashed += j
+        hashed += dj
+        gradient = np.take(gradients, hashed)
+        cx *= gradient.real
+        cy *= gradient.imag
+        cx += cy
+        falloff *= cx
+        result += falloff
+    # The extremes of the sum, with unit gradients, are about +-1 / 99.2.
+    result *= dtype(99.2)
+    return result
+
+
+def _fractal(octave: Callable, shape: Tuple[int, int], scale: float,
+             octaves: int, persistence: float, seed: int,
+             offset: Tuple[float, float], dtype, threads: int) -> np.ndarray:
+    dtype = np.dtype(dtype).type
+    height, width = shape
+    rng = np.random.default_rng(seed)
+    perm = rng.permutation(256).astype(np.intp)
+    # Shift each octave by a random amount so that they don't share the
+    # lattice point at the origin.
+    shifts = rng.uniform(0, 256, size=(octaves, 2))
+    amplitudes = persistence ** np.arange(octaves)
+
+    result = np.zeros(shape, dtype=dtype)
+    columns = np.arange(width) + offset[1]
+    block = max(1, _BLOCK_SIZE // width)
+
+    def render_rows(y: int):
+        rows = np.arange(y, min(y + block, height)) + offset[0]
+        for o in range(octaves):
+            frequency = 2.0 ** o / scale
+            noise = octave(columns * frequency + shifts[o, 0],
+                           rows * frequency + shifts[o, 1], perm, dtype)
+            noise *= dtype(amplitudes[o])
+            result[y:y + block] += noise
+
+    # NumPy releases the GIL, so blocks of rows render in parallel.
+    with ThreadPoolExecutor(threads) as executor:
+        for _ in executor.map(render_rows, range(0, height, block)):
+            pass
+    result /= dtype(amplitudes.sum())
+    return result
+
+
+def perlin(shape: Tuple[int, int], scale: float = 100.0, octaves: int = 1,
+           persistence: float = 0.5, seed: int = 0,
+           offset: Tuple[float, float] = (0, 0),
+           dtype=np.float32, threads: int = None) -> np.ndarray:
+    """ Fractal Perlin noise.
+
+    Args:
+        shape: (height, width) of the result.
+        scale: Size in pixels of a lattice cell of the first octave.
+        octaves: Number of octaves.
+        persistence: Amplitude of each octave relative to the last.
+        seed: Random seed.
+        offset: (row, column) of the top left pixel in the noise field.
+        dtype: float32 or float64.
+        threads: Number of threads, default is one per core.
+
+    Returns:
+        Noise of the given shape, in [-1, 1].
+    """
+    return _fractal(_perlin_octave, shape, scale, octaves, persistence, seed,
+                    offset, dtype, threads)
+
+
+def simplex(shape: Tuple[int, int], scale: float = 100.0, octaves: int = 1,
+            persistence: float = 0.5, seed: int = 0,
+            offset: Tuple[float, float] = (0, 0),
+            dtype=np.float32, threads: int = None) -> np.ndarray:
+    """ Fractal simplex noise, see perlin() for the arguments. """
+    return _fractal(_simplex_octave, shape, scale, octaves, persistence,
+                    seed, offset, dtype, threads)
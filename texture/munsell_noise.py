@@ -0,0 +1,146 @@
+""" Broken color noise in Munsell space.
+
+Usage:
+    python -m texture.munsell_noise [--size 2048x2048] [--jitter 1 0.5 2]
+        [--field simplex] output.png 5YR 6 4
+
+A base Munsell color is jittered in hue, value and chroma by three
+independent noise fields, so a texture varies the way a painter would vary a
+mixed color rather than by moving raw RGB channels. The jittered colors are
+converted to RGB in one vectorized pass with munsell.to_rgb(continuous=True).
+
+The fields are fractal simplex noise (texture.fractal_noise), or 1/f^power
+spectral noise (texture.filter_bank). Simplex fields can be rendered in
+strips, so textures at print resolution are written to a PNG without ever
+being held in memory whole.
+
+"""
+from typing import Tuple
+import argparse
+import numpy as np
+from color import munsell
+from texture import filter_bank
+from texture.fractal_noise import simplex
+from texture.print_noise import PNGWriter
+
+
+FIELDS = ('simplex', 'spectral')
+
+
+def noise_fields(shape: Tuple[int, int], field: str = 'simplex',
+                 seed: int = 0, offset: Tuple[int, int] = (0, 0),
+                 scale: float = 100.0, octaves: int = 6,
+                 persistence: float = 0.5, power: float = -1.0) \
+        -> np.ndarray:
+    """ Three independent noise fields in [-1, 1], shape (3,) + shape.
+
+    Args:
+        shape: (height, width) of the fields.
+        field: 'simplex' or 'spectral'.
+        seed: Random seed.
+        offset: (row, column) of the top left pixel, simplex only.
+        scale, octaves, persistence: Simplex noise parameters, see
+            fractal_noise.simplex().
+        power: Exponent of the amplitude spectrum of spectral noise.
+    """
+    if field == 'simplex':
+        return np.stack([simplex(shape, scale, octaves, persistence,
+                                 seed * 3 + k, offset) for k in range(3)])
+    elif field == 'spectral':
+        if offset != (0, 0):
+            raise ValueError('spectral fields can not be offset')
+        size = max(shape)
+        fields = filter_bank.synthesize('power_law', size, 3,
+                                        np.random.default_rng(seed),
+                                        power=power)
+        fields = np.moveaxis(fields[:shape[0], :shape[1]], 2, 0)
+        fields /= np.abs(fields).max(axis=(1, 2), keepdims=True)
+        return fields
+    else:
+        raise ValueError('unknown field: ' + field)
+
+
+def jitter(fields: np.ndarray, hue, value: float, chroma: float,
+           amplitudes: Tuple[float, float, float]) -> np.ndarray:
+    """ Convert noise fields to the RGB colors of a jittered Munsell color.
+
+    Args:
+        fields: Hue, value and chroma noise, shape (3, ...), in [-1, 1].
+        hue: Base hue, e.g. "5YR", or a (fractional) hue index.
+        value: Base value.
+        chroma: Base chroma.
+        amplitudes: Largest change of hue (in hue index steps of 2.5 Munsell
+            hue units), value and chroma.
+
+    Returns:
+        uint8 array of shape fields.shape[1:] + (3,).
+    """
+    if isinstance(hue, str):
+        hue = munsell.hue_to_index(hue)
+    hues = fields[0] * np.float32(amplitudes[0]) + np.float32(hue)
+    values = fields[1] * np.float32(amplitudes[1]) + np.float32(value)
+    chromas = fields[2] * np.float32(amplitudes[2]) + np.float32(chroma)
+    np.maximum(chromas, 0, out=chromas)
+    return munsell.to_rgb(hues, values, chromas, continuous=True)
+
+
+def munsell_noise(shape: Tuple[int, int], hue, value: float, chroma: float,
+                  amplitudes: Tuple[float, float, float] = (1, 0.5, 2),
+                  field: str = 'simplex', seed: int = 0, **parameters) \
+        -> np.ndarray:
+    """ Render a broken color texture as an (height, width, 3) uint8 array.
+
+    See jitter() and noise_fields() for the arguments.
+    """
+    fields = noise_fields(shape, field, seed, **parameters)
+    return jitter(fields, hue, value, chroma, amplitudes)
+
+
+def render(filename: str, shape: Tuple[int, int], hue, value: float,
+           chroma: float, amplitudes: Tuple[float, float, float] = (1, 0.5, 2),
+           seed: int = 0, strip_rows: int = 256, **parameters):
+    """ Write a simplex broken color texture to a PNG, strip by strip. """
+    height, width = shape
+    writer = PNGWriter(filename, width, height, 3)
+    for y in range(0, height, strip_rows):
+        rows = min(strip_rows, height - y)
+        fields = noise_fields((rows, width), 'simplex', seed, (y, 0),
+                              **parameters)
+        writer.write_rows(jitter(fields, hue, value, chroma, amplitudes))
+    writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Broken color noise in Munsell space.')
+    parser.add_argument('output', help='PNG file')
+    parser.add_argument('hue', help='base hue, e.g. 5YR')
+    parser.add_argument('value', type=float, help='base value')
+    parser.add_argument('chroma', type=float, help='base chroma')
+    parser.add_argument('--size', default='2048x2048',
+                        help='WIDTHxHEIGHT in pixels')
+    parser.add_argument('--jitter', type=float, nargs=3, default=(1, 0.5, 2),
+                        metavar=('HUE', 'VALUE', 'CHROMA'),
+                        help='largest change of hue (index steps), value '
+                             'and chroma')
+    parser.add_argument('--field', choices=FIELDS, default='simplex')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=100.0,
+                        help='simplex feature size in pixels')
+    parser.add_argument('--octaves', type=int, default=6)
+    parser.add_argument('--power', type=float, default=-1.0,
+                        help='spectral noise power')
+    args = parser.parse_args()
+    width, height = (int(x) for x in args.size.split('x'))
+    if args.field == 'simplex':
+        render(args.output, (height, width), args.hue, args.value,
+               args.chroma, args.jitter, args.seed, scale=args.scale,
+               octaves=args.octaves)
+    else:
+        writer = PNGWriter(args.output, width, height, 3)
+        writer.write_rows(munsell_noise((height, width), args.hue,
+                                        args.value, args.chroma, args.jitter,
+                                        'spectral', args.seed,
+                                        power=args.power))
+        writer.close()
+    print('file', args.output, 'written')
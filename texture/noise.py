@@ -6,60 +6,56 @@ pink noise
 
 """
 import numpy as np
-import PIL
-import torch
-from torch import Tensor
-import dft
-import images
-import whiten
-import laplacian
-import complex
-
-
-def save_image(tensor: Tensor, filename: str):
-    assert images.is_image(tensor)
-    min = torch.min(tensor)
-    max = torch.max(tensor)
-    visual = ((tensor - min) / (max - min)).squeeze(0)
-    array = (visual.numpy() * 255).astype(np.uint8)
-    image = PIL.Image.fromarray(array)
+import matplotlib.pyplot as plt
+from PIL import Image
+from numpy.fft import fftshift
+from texture import filter_bank
+
+
+def save_image(tensor: np.ndarray, filename: str):
+    min = tensor.min()
+    max = tensor.max()
+    visual = ((tensor - min) / (max - min))
+    array = (visual * 255).astype(np.uint8)
+    image = Image.fromarray(array)
     image.save(filename)
 
 
-# Create complex random Gaussian field, Gaussian in both real and imaginary.
-size = 2048
-noise = np.random.normal(size=(size, size))
-real = torch.from_numpy(noise).float().unsqueeze(0)
-noise = np.random.normal(size=(size, size))
-imag = torch.from_numpy(noise).float().unsqueeze(0)
-spectral_gaussian = complex.cast(real, imag)
-save_image(real, '_noise_gaussian.png')
-
-# Olshausen noise, approximates human visual system response
-olshausen_filter = whiten.Filters.inverse(size)
-product = complex.multiply(spectral_gaussian, olshausen_filter)
-result = complex.real_(dft.invert2d(product))
-save_image(result, '_noise_olshausen.png')
-
-# Our base filter is the inverse Laplacian which corresponds to 1 / f noise
-base_filter = laplacian.Filters.inverse(size)
-product = complex.multiply(spectral_gaussian, base_filter)
-result = complex.real_(dft.invert2d(product))
-save_image(result, '_noise_1_over_f.png')
-
-images.display(
-    ('olshausen spectrum', complex.real_(olshausen_filter)),
-    ('laplacian spectrum', complex.real_(base_filter))
-)
-
-
-filter = whiten.Filters.inverse(size)
-#filter = laplacian.Filters.inverse(size)
-'''
-print('filter shape', filter.shape)
-product = complex.multiply(tensor, filter)
-print('product shape', product.shape)
-
-images.display(complex.real_(tensor), result)
-images.display(complex.real_(tensor), save_file='junk.png')
-'''
\ No newline at end of file
+def full_spectrum(envelope: np.ndarray) -> np.ndarray:
+    """ Expand a half-plane envelope to the full, centered spectrum. """
+    size = envelope.shape[0]
+    mirrored = envelope[(-np.arange(size)) % size, 1:size - size // 2][:, ::-1]
+    return fftshift(np.concatenate((envelope, mirrored), axis=1))
+
+
+if __name__ == '__main__':
+    # The same complex random Gaussian field, Gaussian in both real and
+    # imaginary, is shaped by each filter.
+    size = 2048
+    rng = np.random.default_rng(0)
+    save_image(rng.standard_normal((size, size)), '_noise_gaussian.png')
+
+    # Olshausen noise, approximates human visual system response
+    result = filter_bank.synthesize('olshausen', size,
+                                    rng=np.random.default_rng(1))
+    save_image(result, '_noise_olshausen.png')
+
+    # Our base filter is the inverse Laplacian which corresponds to 1 / f
+    # noise
+    result = filter_bank.synthesize('inverse_laplacian', size,
+                                    rng=np.random.default_rng(1))
+    save_image(result, '_noise_1_over_f.png')
+
+    # Pink noise
+    result = filter_bank.synthesize('power_law', size,
+                                    rng=np.random.default_rng(1), power=-1.0)
+    save_image(result, '_noise_pink.png')
+
+    plt.subplot(1, 2, 1)
+    plt.title('olshausen spectrum')
+    plt.imshow(full_spectrum(filter_bank.envelope('olshausen', size)))
+    plt.subplot(1, 2, 2)
+    plt.title('laplacian spectrum')
+    plt.imshow(np.log1p(full_spectrum(
+        filter_bank.envelope('inverse_laplacian', size))))
+    plt.show()
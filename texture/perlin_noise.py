@@ -1,19 +1,19 @@
-""" Canned Perlin noise
+""" Perlin noise
 
     Self-similar over scale (fractal) so can be used on any size figure or face
-    Generated on cpetry.github.io/TextureGenerator-Online with parameters:
+    Generated by texture.fractal_noise with the parameters once used on
+    cpetry.github.io/TextureGenerator-Online:
         Type: Perlin Noise
         Octaves: 10
         Scale: 100
         Persistence: 1
         Seed: 1
 
-    The output file from the above website i is ../data/PerlinNoise.png
-    This program merely displays that file along with its spectrum.
+    This program displays the noise along with its spectrum.
 """
 import numpy as np
 import matplotlib.pyplot as plt
-from PIL import Image
+from texture.fractal_noise import perlin
 
 
 def rgb2gray(rgb):
@@ -32,8 +32,8 @@ def show_spectrum(image: np.ndarray):
 
 
 if __name__ == '__main__':
-    filename = '../data/PerlinNoise.png'
-    image = rgb2gray(np.asarray(Image.open(filename))[:, :])
+    image = perlin((1024, 1024), scale=100, octaves=10, persistence=1,
+                   seed=1)
 
     plt.title('multi-scale Perlin noise')
     plt.imshow(image, cmap='gray')
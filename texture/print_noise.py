@@ -0,0 +1,199 @@
+""" 1/f noise at print resolution, rendered out of core.
+
+Usage:
+    python -m texture.print_noise [--size 20000] [--power -1] [--color]
+        [--seed 0] [--strip-mb 64] output.png
+
+A 20,000 pixel square color texture is 1.2 GB as 8 bit pixels and several
+times that as a float spectrum, so it is never held in memory. The 2D
+inverse FFT is separable; it is done in two passes over a complex
+intermediate array memory-mapped in a scratch directory:
+
+    1. Column strips of the half-plane spectrum (random phases times the
+       1/f^power envelope) are generated and inverse transformed along the
+       columns.
+    2. Row strips of the intermediate are inverse real transformed along the
+       rows, giving strips of the final noise. This is done twice: once to
+       find the global minimum and maximum, and again to write the noise,
+       normalized, to the output.
+
+The output is a PNG written row by row, or a .npy uint8 array (memory
+mapped). Peak memory is a few times the strip size, whatever the output size.
+
+The noise is the same as spectral_noise.noise() makes, but the random phases
+are drawn per block of columns, so the result depends on the seed only.
+
+"""
+from typing import Iterator, Tuple
+import argparse
+import math
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+from scipy import fft as sp_fft
+
+
+# Spectrum columns per independently seeded block of random phases.
+PHASE_BLOCK = 64
+
+
+def _spectrum_strip(size: int, power: float, channels: int, seed: int,
+                    first_block: int, last_block: int) -> np.ndarray:
+    """ Half-plane spectrum columns of blocks [first_block, last_block). """
+    columns = size // 2 + 1
+    c0 = first_block * PHASE_BLOCK
+    c1 = min(last_block * PHASE_BLOCK, columns)
+    phase = np.empty((size, c1 - c0, channels), dtype=np.float32)
+    for block in range(first_block, last_block):
+        b0 = block * PHASE_BLOCK - c0
+        b1 = min(b0 + PHASE_BLOCK, c1 - c0)
+        rng = np.random.default_rng([seed, block])
+        phase[:, b0:b1] = rng.random((size, b1 - b0, channels),
+                                     dtype=np.float32)
+    phase *= np.float32(2 * math.pi)
+
+    fy = np.fft.fftfreq(size, 1.0 / size).astype(np.float32)
+    fx = np.fft.rfftfreq(size, 1.0 / size).astype(np.float32)[c0:c1]
+    dist_sq = fy[:, np.newaxis] ** 2 + fx[np.newaxis, :] ** 2
+    if c0 == 0:
+        dist_sq[0, 0] = 1
+    amplitude = np.power(dist_sq, 0.5 * power, out=dist_sq)
+    if c0 == 0:
+        amplitude[0, 0] = 0
+    # Same scale as spectral_noise.noise().
+    amplitude *= np.float32(math.sqrt(0.5))
+
+    spectrum = np.empty(phase.shape, dtype=np.complex64)
+    np.cos(phase, out=spectrum.real)
+    np.sin(phase, out=phase)
+    spectrum.imag = phase
+    spectrum *= amplitude[:, :, np.newaxis]
+    return spectrum
+
+
+def _row_strips(intermediate: np.ndarray, size: int, rows: int) \
+        -> Iterator[Tuple[int, np.ndarray]]:
+    """ Yield (first row, noise rows) strips of the final noise. """
+    for y in range(0, size, rows):
+        strip = np.array(intermediate[y:y + rows])
+        yield y, sp_fft.irfft(strip, n=size, axis=1, overwrite_x=True,
+                              workers=-1)
+
+
+class PNGWriter:
+    """ Write an 8 bit grayscale or RGB PNG file row by row. """
+
+    def __init__(self, filename: str, width: int, height: int,
+                 channels: int):
+        self._file = open(filename, 'wb')
+        self._compressor = zlib.compressobj(6)
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        color_type = {1: 0, 3: 2}[channels]
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                         color_type, 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes):
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, rows: np.ndarray):
+        """ Append rows, a uint8 array of shape (rows, width[, channels]). """
+        rows = rows.reshape(rows.shape[0], -1)
+        # Each row starts with filter type 0 (none).
+        filtered = np.zeros((rows.shape[0], rows.shape[1] + 1), np.uint8)
+        filtered[:, 1:] = rows
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+
+    def close(self):
+        self._chunk(b'IDAT', self._compressor.flush())
+        self._chunk(b'IEND', b'')
+        self._file.close()
+
+
+def render(filename: str, size: int, power: float = -1.0,
+           channels: int = 1, seed: int = 0, strip_bytes: int = 64 << 20,
+           scratch_dir: str = None):
+    """ Render 1/f^power noise, normalized to 8 bits, to a file.
+
+    Args:
+        filename: Output file, .png or .npy.
+        size: Width and height of the noise.
+        power: Exponent of the amplitude spectrum, e.g. -1 for 1/f noise.
+        channels: 1 for grayscale, 3 for color (independent channels).
+        seed: Random seed.
+        strip_bytes: Approximate size of a complex strip in memory.
+        scratch_dir: Directory for the intermediate array, default is the
+            system temporary directory. It needs 8 * size * (size / 2 + 1)
+            * channels bytes.
+    """
+    columns = size // 2 + 1
+    blocks = (columns + PHASE_BLOCK - 1) // PHASE_BLOCK
+    pixel_bytes = 8 * channels
+    strip_blocks = max(1, strip_bytes // (pixel_bytes * size * PHASE_BLOCK))
+    strip_rows = max(1, strip_bytes // (pixel_bytes * columns))
+
+    with tempfile.TemporaryDirectory(dir=scratch_dir) as scratch:
+        intermediate = np.lib.format.open_memmap(
+            os.path.join(scratch, 'intermediate.npy'), mode='w+',
+            dtype=np.complex64, shape=(size, columns, channels))
+        for block in range(0, blocks, strip_blocks):
+            last_block = min(block + strip_blocks, blocks)
+            strip = _spectrum_strip(size, power, channels, seed, block,
+                                    last_block)
+            intermediate[:, block * PHASE_BLOCK:
+                         block * PHASE_BLOCK + strip.shape[1]] = \
+                sp_fft.ifft(strip, axis=0, overwrite_x=True, workers=-1)
+        intermediate.flush()
+
+        low, high = np.inf, -np.inf
+        for _, strip in _row_strips(intermediate, size, strip_rows):
+            low = min(low, strip.min())
+            high = max(high, strip.max())
+        scale = 255 / (high - low)
+
+        shape = (size, size) if channels == 1 else (size, size, channels)
+        if filename.endswith('.npy'):
+            output = np.lib.format.open_memmap(filename, mode='w+',
+                                               dtype=np.uint8, shape=shape)
+        else:
+            output = PNGWriter(filename, size, size, channels)
+        for y, strip in _row_strips(intermediate, size, strip_rows):
+            strip -= low
+            strip *= scale
+            pixels = strip.astype(np.uint8).reshape((-1,) + shape[1:])
+            if isinstance(output, PNGWriter):
+                output.write_rows(pixels)
+            else:
+                output[y:y + len(pixels)] = pixels
+        if isinstance(output, PNGWriter):
+            output.close()
+        else:
+            output.flush()
+        del intermediate
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Render 1/f noise at print resolution.')
+    parser.add_argument('output', help='output file, .png or .npy')
+    parser.add_argument('--size', type=int, default=20000,
+                        help='width and height in pixels')
+    parser.add_argument('--power', type=float, default=-1.0,
+                        help='exponent of the amplitude spectrum')
+    parser.add_argument('--color', action='store_true',
+                        help='three independent channels')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--strip-mb', type=int, default=64,
+                        help='approximate strip size in MB')
+    parser.add_argument('--scratch-dir',
+                        help='directory for the intermediate array')
+    args = parser.parse_args()
+    render(args.output, args.size, args.power, 3 if args.color else 1,
+           args.seed, args.strip_mb << 20, args.scratch_dir)
+    print('file', args.output, 'written')
@@ -12,11 +12,11 @@ cubic_noise_a_simple_alternative_to_perlin_noise/
 
 """
 import numpy as np
-import matplotlib.pyplot as plt
 import math
-import imageio
-import PIL
+import PIL.Image
 from numpy.fft import fft2, ifft2, ifftshift, fftshift
+from scipy import fft as sp_fft
+from texture import filter_bank
 
 
 def save_image(tensor: np.ndarray, filename: str):
@@ -28,28 +28,57 @@ def save_image(tensor: np.ndarray, filename: str):
     image.save(filename)
 
 
-def noise(size: int, power=-1.0) -> np.ndarray:
-    """ Generate 1 / f^power noise. """
-    offsets = np.fft.fftshift(np.arange(size, dtype='complex128') - size / 2)
-    [xvals, yvals] = np.meshgrid(offsets, offsets)
-    dist_sq = xvals * xvals + yvals * yvals
-    f = lambda r: 0j if r == 0.0 else np.power(r, 0.5 * power)
-    noise = np.real(np.fft.ifft2(
-        np.exp(2j * math.pi * np.random.rand(size, size)) *
-        np.vectorize(f)(dist_sq)))
-    return noise
-
-
-def color_noise(size: int, power=-1.0) -> np.ndarray:
+def envelope(size: int, power=-1.0, dtype=np.float32) -> np.ndarray:
+    """ Amplitude spectrum f^power of 1 / f^power noise, in the half-plane
+    layout of rfft2. Zero at DC.
+    """
+    return filter_bank.envelope('power_law', size, dtype, power=power)
+
+
+def noise(size: int, power=-1.0, channels: int = None,
+          rng: np.random.Generator = None, dtype=np.float32) -> np.ndarray:
+    """ Generate 1 / f^power noise.
+
+    Every frequency gets the amplitude of the envelope and a random phase.
+    All channels are made with one real inverse FFT.
+
+    Args:
+        size: Width and height of the noise.
+        power: Exponent of the amplitude spectrum, e.g. -1 for 1/f noise.
+        channels: Number of independent channels, None for a single 2D
+            field.
+        rng: Random generator, default is NumPy's global one.
+        dtype: float32 or float64.
+
+    Returns:
+        Noise of shape (size, size) or (size, size, channels).
+    """
+    dtype = np.dtype(dtype).type
+    amplitude = envelope(size, power, dtype)
+    shape = amplitude.shape + (1 if channels is None else channels,)
+    if rng is None:
+        phase = np.random.random_sample(shape).astype(dtype)
+    else:
+        phase = rng.random(shape, dtype=dtype)
+    phase *= dtype(2 * math.pi)
+    # Scale to the variance of the real part of a full complex spectrum of
+    # random phases, which is how this noise used to be made.
+    amplitude = amplitude[:, :, np.newaxis] * dtype(math.sqrt(0.5))
+    spectrum = np.empty(shape, dtype=np.result_type(dtype, np.complex64))
+    np.cos(phase, out=spectrum.real)
+    np.sin(phase, out=phase)
+    spectrum.imag = phase
+    del phase
+    spectrum *= amplitude
+    noise = sp_fft.irfft2(spectrum, s=(size, size), axes=(0, 1),
+                          overwrite_x=True, workers=-1)
+    return noise[:, :, 0] if channels is None else noise
+
+
+def color_noise(size: int, power=-1.0, rng: np.random.Generator = None,
+                dtype=np.float32) -> np.ndarray:
     """ Generate 1 / f^power noise, in color. """
-    r = noise(size, power)
-    g = noise(size, power)
-    b = noise(size, power)
-    image = np.ndarray((size, size, 3))
-    image[:, :, 0] = r
-    image[:, :, 1] = g
-    image[:, :, 2] = b
-    return image
+    return noise(size, power, 3, rng, dtype)
 
 
 def rgb2gray(rgb):
@@ -75,6 +104,8 @@ def gaussian_spectral_noise(size: int, sigma=1.0, mu=0.0) -> np.ndarray:
 
 
 if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
     size = 4096
     save_image(noise(size, power=-0.5), 'noise_1_over_f.jpg')
     '''
@@ -0,0 +1,169 @@
+""" Radially averaged power spectra of textures and photos.
+
+Usage:
+    python -m texture.spectrum [--whiten] [--processes N] [--output file]
+        path...
+
+Each path is an image file (.npy or anything PIL reads) or a directory of
+them. For every image the power spectrum of its gray levels is averaged over
+rings of equal spatial frequency, and a power law 1/f^alpha is fitted to it
+in log-log space. Natural images have alpha near 2, white noise 0, and a
+good whitening filter brings a photo close to 0 over the middle frequencies.
+
+Images are analyzed in parallel, one per process. The summary is printed,
+and with --output the spectra themselves are written to a JSON file.
+
+"""
+from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import numpy as np
+from PIL import Image
+from scipy import fft as sp_fft
+from filter.whiten import whiten
+
+
+# Extensions of the image files analyzed in a directory.
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.npy')
+
+
+def load_gray(filename: str) -> np.ndarray:
+    """ Load an image as a float64 grayscale array in [0, 1]. """
+    if filename.endswith('.npy'):
+        image = np.load(filename)
+    else:
+        with Image.open(filename) as f:
+            image = np.asarray(f.convert('RGB'))
+    if image.dtype == np.uint8:
+        image = image / 255.0
+    if image.ndim == 3:
+        image = np.dot(image[..., :3], [0.299, 0.587, 0.114])
+    return image.astype(np.float64)
+
+
+def radial_power_spectrum(image: np.ndarray, window: bool = True) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """ Radially averaged power spectrum of a 2D image.
+
+    Args:
+        image: Grayscale image.
+        window: Apply a Hann window first, to keep the image borders from
+            adding power along the axes.
+
+    Returns:
+        (frequencies, power): bin centers in cycles per pixel, from
+        1 / max(height, width) up to the Nyquist frequency 0.5, and the mean
+        power of the frequencies in each bin.
+    """
+    height, width = image.shape
+    image = image - image.mean()
+    if window:
+        image = image * (np.hanning(height)[:, np.newaxis] *
+                         np.hanning(width)[np.newaxis, :])
+    spectrum = sp_fft.rfft2(image, workers=-1)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+
+    # Rings one frequency step wide. The half-plane holds one of each pair of
+    # symmetric frequencies, which have the same power, so the mean is that
+    # of the full plane.
+    size = max(height, width)
+    fy = np.fft.fftfreq(height)[:, np.newaxis]
+    fx = np.fft.rfftfreq(width)[np.newaxis, :]
+    ring = np.rint(np.sqrt(fy ** 2 + fx ** 2) * size).astype(np.intp)
+    bins = size // 2 + 1
+    inside = ring < bins
+    totals = np.bincount(ring[inside], weights=power[inside], minlength=bins)
+    counts = np.bincount(ring[inside], minlength=bins)
+    # Skip DC, and any empty rings of very elongated images.
+    used = counts > 0
+    used[0] = False
+    return (np.arange(bins)[used] / size,
+            totals[used] / counts[used])
+
+
+def fit_power_law(frequencies: np.ndarray, power: np.ndarray,
+                  low: float = 0.01, high: float = 0.35) \
+        -> Tuple[float, float]:
+    """ Fit power = amplitude / f^alpha between frequencies low and high
+    (cycles per pixel), by least squares on log-log axes.
+
+    Returns:
+        (alpha, amplitude)
+    """
+    fit = (frequencies >= low) & (frequencies <= high) & (power > 0)
+    if fit.sum() < 2:
+        raise ValueError('not enough frequencies to fit')
+    slope, intercept = np.polyfit(np.log(frequencies[fit]),
+                                  np.log(power[fit]), 1)
+    return -slope, float(np.exp(intercept))
+
+
+def analyze(filename: str, whitened: bool = False) -> dict:
+    """ Spectrum and power law fit of an image file, and optionally of the
+    image after whitening. """
+    image = load_gray(filename)
+    results = {'file': filename, 'shape': list(image.shape)}
+    images = [('', image)]
+    if whitened:
+        images.append(('whitened_', whiten(image)))
+    for prefix, pixels in images:
+        frequencies, power = radial_power_spectrum(pixels)
+        alpha, amplitude = fit_power_law(frequencies, power)
+        results[prefix + 'alpha'] = alpha
+        results[prefix + 'amplitude'] = amplitude
+        results[prefix + 'frequencies'] = frequencies.tolist()
+        results[prefix + 'power'] = power.tolist()
+    return results
+
+
+def image_files(paths: List[str]) -> List[str]:
+    """ Expand directories to the image files they hold, sorted. """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)))
+        else:
+            files.append(path)
+    return files
+
+
+def _set_max_image_pixels(pixels: int):
+    Image.MAX_IMAGE_PIXELS = pixels
+
+
+def analyze_files(files: List[str], whitened: bool = False,
+                  processes: int = None) -> List[dict]:
+    """ analyze() each file, in parallel. The workers use this process's
+    PIL image size limit. """
+    with ProcessPoolExecutor(processes, initializer=_set_max_image_pixels,
+                             initargs=(Image.MAX_IMAGE_PIXELS,)) as executor:
+        return list(executor.map(analyze, files, [whitened] * len(files)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Radially averaged power spectra of images.')
+    parser.add_argument('paths', nargs='+', help='image files or directories')
+    parser.add_argument('--whiten', action='store_true',
+                        help='also analyze the whitened images')
+    parser.add_argument('--processes', type=int,
+                        help='number of processes, default is one per core')
+    parser.add_argument('--output', help='JSON file for the spectra')
+    args = parser.parse_args()
+    Image.MAX_IMAGE_PIXELS = None  # Allow very large photos and scans.
+
+    results = analyze_files(image_files(args.paths), args.whiten,
+                            args.processes)
+    for result in results:
+        line = '%-40s alpha %5.2f' % (result['file'], result['alpha'])
+        if args.whiten:
+            line += '   whitened alpha %5.2f' % result['whitened_alpha']
+        print(line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f)
+        print('file', args.output, 'written')